@@ -1,112 +1,148 @@
-import os
-import subprocess
-from azure.identity import DefaultAzureCredential
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.containerregistry import ContainerRegistryManagementClient
-from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
+from azure.containerregistry import ContainerRegistryClient
+from azure.core.exceptions import AzureError, ClientAuthenticationError, HttpResponseError
+
+from azure_hello.azure_context import clear_cache, get_client, get_credential, get_subscription_id
 
 # Prerequisites:
 # 1. Install required packages:
-#    pip install azure-identity azure-mgmt-resource azure-mgmt-containerregistry
+#    pip install azure-identity azure-mgmt-resource azure-mgmt-containerregistry azure-containerregistry
 # 2. Authenticate with Azure:
 #    - Run 'az login' in your terminal OR
 #    - Set environment variables: AZURE_CLIENT_ID, AZURE_TENANT_ID, AZURE_CLIENT_SECRET, AZURE_SUBSCRIPTION_ID
 
-def get_azure_state():
+DEFAULT_MAX_WORKERS = 8
+
+
+@dataclass
+class ResourceGroupState:
+    name: str
+    location: str
+
+
+@dataclass
+class RegistryState:
+    name: str
+    resource_group: str
+    location: str
+    sku: str
+    login_server: str
+    repositories: list = field(default_factory=list)
+    error: str = None
+
+
+@dataclass
+class AzureState:
+    subscription_id: str
+    resource_groups: list = field(default_factory=list)
+    registries: list = field(default_factory=list)
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _registry_state(registry):
+    # ID format: /subscriptions/.../resourceGroups/RG_NAME/providers/...
+    parts = registry.id.split("/")
+    return RegistryState(
+        name=registry.name,
+        resource_group=parts[4] if len(parts) > 4 else "Unknown",
+        location=registry.location,
+        sku=registry.sku.name,
+        login_server=registry.login_server,
+    )
+
+
+def list_repositories(credential, registry):
+    """Fill registry.repositories from the registry's data-plane API (replaces `az acr repository list`)."""
+    try:
+        with ContainerRegistryClient(f"https://{registry.login_server}", credential) as client:
+            registry.repositories = sorted(client.list_repository_names())
+    except AzureError as e:
+        # One unreachable registry (auth, HTTP or network error) should not hide the rest of the inventory.
+        registry.error = str(e).splitlines()[0]
+    return registry
+
+
+def get_azure_state(subscription_id=None, max_workers=DEFAULT_MAX_WORKERS):
     """
-    Connects to Azure and lists resource groups and container registries.
+    Collects resource groups, container registries and their repositories.
+    The two management listings run in parallel, then every registry's
+    repositories are listed concurrently over the data-plane API.
     """
-    try:
-        # --- Authentication ---
-        # Use DefaultAzureCredential which checks common credential sources
-        # (environment variables, managed identity, Azure CLI, etc.)
-        credential = DefaultAzureCredential()
-
-        # --- Get Subscription ID ---
-        # Try getting subscription ID from environment variable first
-        subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID")
-        if not subscription_id:
-            print("Warning: AZURE_SUBSCRIPTION_ID environment variable not set.")
-            print("Attempting to fetch default subscription ID from Azure CLI...")
-            try:
-                # Run 'az account show' command
-                result = subprocess.run(
-                    ["az", "account", "show", "--query", "id", "-o", "tsv"],
-                    capture_output=True, text=True, check=True, shell=False # Use shell=False for security
-                )
-                subscription_id = result.stdout.strip() # Get the output and remove leading/trailing whitespace
-                if not subscription_id:
-                    print("Error: Azure CLI did not return a subscription ID. Is it configured with a default subscription?")
-                    return
-                print(f"Successfully fetched subscription ID from Azure CLI: {subscription_id}")
-            except FileNotFoundError:
-                print("Error: Azure CLI ('az') command not found. Please install it or set the AZURE_SUBSCRIPTION_ID environment variable.")
-                return
-            except subprocess.CalledProcessError as e:
-                print(f"Error: Azure CLI command failed: {e}")
-                print("Hint: Are you logged in to Azure CLI ('az login')?")
-                print(f"Stderr: {e.stderr.strip()}")
-                return
-            except Exception as e:
-                print(f"An unexpected error occurred while running Azure CLI: {e}")
-                return
-
-        # Ensure subscription_id is not None before proceeding
-        if not subscription_id:
-             print("Error: Could not determine Azure Subscription ID.")
-             return
-
-        print(f"\nUsing Subscription ID: {subscription_id}")
-
-        # --- List Resource Groups ---
-        print("\n--- Resource Groups ---")
-        resource_client = ResourceManagementClient(credential, subscription_id)
-        resource_groups = resource_client.resource_groups.list()
-
-        rg_count = 0
-        for rg in resource_groups:
-            print(f"- Name: {rg.name}, Location: {rg.location}")
-            rg_count += 1
-        if rg_count == 0:
-            print("No resource groups found in this subscription.")
-
-        # --- List Container Registries ---
-        print("\n--- Container Registries (ACR) ---")
-        acr_client = ContainerRegistryManagementClient(credential, subscription_id)
-        registries = acr_client.registries.list()
-
-        acr_count = 0
-        for reg in registries:
-            # Get the resource group name from the registry ID
-            # ID format: /subscriptions/.../resourceGroups/RG_NAME/providers/...
-            
-            try:
-                rg_name = reg.id.split('/')[4]
-            except IndexError:
-                rg_name = "Unknown" # Should not happen with valid IDs
-
-            print(f"- Name: {reg.name}, Resource Group: {rg_name}, Location: {reg.location}, SKU: {reg.sku.name}, Login Server: {reg.login_server}")
-            acr_count += 1
-
-            # List repositories in the registry
-            print("\n--- Repositories in the registry ---")
-            # az acr repository list --name helloacr04042025 --output table
-            output = subprocess.run(["az", "acr", "repository", "list", "--name", reg.name, "--output", "table"], check=True, text=True, capture_output=True, shell=False)
-            print(output.stdout)
-
-            
-        if acr_count == 0:
-            print("No container registries found in this subscription.")
+    credential = get_credential()
+    subscription_id = subscription_id or get_subscription_id()
+    resource_client = get_client(ResourceManagementClient, subscription_id)
+    acr_client = get_client(ContainerRegistryManagementClient, subscription_id)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="azure-state") as executor:
+        resource_groups = executor.submit(lambda: list(resource_client.resource_groups.list()))
+        registries = executor.submit(lambda: list(acr_client.registries.list()))
+        state = AzureState(
+            subscription_id=subscription_id,
+            resource_groups=[ResourceGroupState(rg.name, rg.location) for rg in resource_groups.result()],
+        )
+        state.registries = list(executor.map(
+            lambda registry: list_repositories(credential, _registry_state(registry)), registries.result(),
+        ))
+    return state
+
+
+def print_state(state):
+    print(f"Using Subscription ID: {state.subscription_id}")
+    print("\n--- Resource Groups ---")
+    for rg in state.resource_groups:
+        print(f"- Name: {rg.name}, Location: {rg.location}")
+    if not state.resource_groups:
+        print("No resource groups found in this subscription.")
 
+    print("\n--- Container Registries (ACR) ---")
+    for reg in state.registries:
+        print(f"- Name: {reg.name}, Resource Group: {reg.resource_group}, Location: {reg.location}, SKU: {reg.sku}, Login Server: {reg.login_server}")
+        if reg.error:
+            print(f"    Could not list repositories: {reg.error}")
+        for repository in reg.repositories:
+            print(f"    {repository}")
+    if not state.registries:
+        print("No container registries found in this subscription.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show resource groups, container registries and their repositories.")
+    parser.add_argument("--json", action="store_true", help="Print the inventory as JSON")
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="Concurrent Azure API calls")
+    parser.add_argument("--refresh-context", action="store_true", help="Forget the cached subscription and ask the Azure CLI again")
+    args = parser.parse_args()
+    if args.refresh_context:
+        clear_cache()
+
+    try:
+        state = get_azure_state(max_workers=args.workers)
     except ClientAuthenticationError:
-        print("\nError: Authentication failed.")
-        print("Please ensure you are logged in via 'az login' or have configured credentials correctly (e.g., environment variables).")
+        print("Error: Authentication failed.", file=sys.stderr)
+        print("Please ensure you are logged in via 'az login' or have configured credentials correctly (e.g., environment variables).", file=sys.stderr)
+        raise SystemExit(1)
     except HttpResponseError as e:
-        print(f"\nError: An Azure API error occurred: {e}")
+        print(f"Error: An Azure API error occurred: {e}", file=sys.stderr)
         if "SubscriptionNotFound" in str(e):
-             print("Hint: Double-check if the AZURE_SUBSCRIPTION_ID is correct and accessible by the credential.")
-    except Exception as e:
-        print(f"\nAn unexpected error occurred: {e}")
+            print("Hint: Double-check if the AZURE_SUBSCRIPTION_ID is correct and accessible by the credential.", file=sys.stderr)
+        raise SystemExit(1)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+    if args.json:
+        print(json.dumps(state.to_dict(), indent=2))
+    else:
+        print_state(state)
+
 
 if __name__ == "__main__":
-    get_azure_state() 
\ No newline at end of file
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# --- Configuration ---
+# Benchmarks always run against the local SQLite stand-in, never Azure SQL.
+os.environ["DB_BACKEND"] = "sqlite"
+
+from azure_hello.client import DBClient  # noqa: E402
+
+ROW_COUNTS = [1_000, 10_000, 100_000]
+WIDE_COLUMNS = 50
+QUICK_ROW_COUNTS = [1_000, 10_000]
+
+
+def timed(func, repeat):
+    """Run func `repeat` times and return per-run durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def summarize(name, durations, rows=None):
+    ordered = sorted(durations)
+    result = {
+        "name": name,
+        "runs": len(durations),
+        "mean_ms": statistics.fmean(durations) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "min_ms": ordered[0] * 1000,
+    }
+    if rows:
+        result["rows"] = rows
+        result["rows_per_s"] = rows / statistics.fmean(durations)
+    print(f"{name:45} {result['p50_ms']:10.3f} ms p50 {result['p95_ms']:10.3f} ms p95"
+          + (f" {result['rows_per_s']:14,.0f} rows/s" if rows else ""))
+    return result
+
+
+def make_client(path):
+    os.environ["SQLITE_PATH"] = path
+    return DBClient()
+
+
+def create_tables(client, rows, wide_rows):
+    client.execute_sql(
+        "CREATE TABLE users (id INT PRIMARY KEY IDENTITY(1,1), username NVARCHAR(50) NOT NULL UNIQUE, "
+        "email NVARCHAR(100) NOT NULL UNIQUE, created_at DATETIME2 DEFAULT GETUTCDATE())"
+    )
+    client.bulk_insert("users", ((f"user{i}", f"user{i}@example.com") for i in range(rows)),
+                       columns=["username", "email"], batch_size=10_000)
+    columns = [f"c{i}" for i in range(WIDE_COLUMNS)]
+    client.execute_sql(f"CREATE TABLE wide ({', '.join(f'{column} INT' for column in columns)})")
+    client.bulk_insert("wide", ([i] * WIDE_COLUMNS for i in range(wide_rows)), columns=columns, batch_size=10_000)
+    client.execute_sql("CREATE TABLE bulk_target (username NVARCHAR(50), email NVARCHAR(100))")
+
+
+def run_benchmarks(row_counts, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite3")
+        client = make_client(path)
+        create_tables(client, max(row_counts), max(row_counts) // 10)
+
+        results.append(summarize("connect (new client + connection)", timed(lambda: make_client(path).connect().close(), repeat * 5)))
+        pooled = DBClient(pooled=True)
+        pooled.connect()
+
+        def checkout():
+            with pooled.pool.connection():
+                pass
+        results.append(summarize("connect (pooled checkout)", timed(checkout, repeat * 5)))
+        results.append(summarize("small query execute_sql", timed(lambda: client.execute_sql("SELECT 1 AS one"), repeat * 20)))
+        results.append(summarize("small query execute (prepared, params)",
+                                 timed(lambda: client.execute("SELECT username FROM users WHERE id = ?", [42]), repeat * 20)))
+
+        for rows in row_counts:
+            sql = f"SELECT TOP {rows} id, username, email, created_at FROM users ORDER BY id"
+            results.append(summarize(f"large result execute_sql [{rows}]", timed(lambda: client.execute_sql(sql), repeat), rows))
+            results.append(summarize(f"large result columnar [{rows}]", timed(lambda: client.execute_sql(sql, columnar=True), repeat), rows))
+            results.append(summarize(f"large result iter_chunks [{rows}]",
+                                     timed(lambda: sum(len(chunk) for chunk in client.iter_chunks(sql)), repeat), rows))
+
+            wide_rows = rows // 10
+            wide_sql = f"SELECT TOP {wide_rows} * FROM wide"
+            results.append(summarize(f"wide table {WIDE_COLUMNS} cols execute_sql [{wide_rows}]",
+                                     timed(lambda: client.execute_sql(wide_sql), repeat), wide_rows))
+            results.append(summarize(f"wide table {WIDE_COLUMNS} cols columnar [{wide_rows}]",
+                                     timed(lambda: client.execute_sql(wide_sql, columnar=True), repeat), wide_rows))
+
+            def bulk_insert():
+                client.bulk_insert("bulk_target", ((f"u{i}", f"u{i}@example.com") for i in range(rows)),
+                                   columns=["username", "email"])
+            results.append(summarize(f"bulk insert [{rows}]", timed(bulk_insert, repeat), rows))
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r") as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+    print(f"\n--- Compared with {baseline_path} (p50) ---")
+    for result in results:
+        previous = baseline.get(result["name"])
+        if previous is None:
+            continue
+        change = (result["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100 if previous["p50_ms"] else 0.0
+        print(f"{result['name']:45} {previous['p50_ms']:10.3f} -> {result['p50_ms']:10.3f} ms ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DBClient data path against a local SQLite stand-in.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (small queries run more)")
+    parser.add_argument("--quick", action="store_true", help=f"Only use row counts {QUICK_ROW_COUNTS}")
+    args = parser.parse_args()
+
+    row_counts = QUICK_ROW_COUNTS if args.quick else ROW_COUNTS
+    results = run_benchmarks(row_counts, args.repeat)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
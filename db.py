@@ -1,21 +1,44 @@
-from azure_hello.client import DBClient
+import argparse
+import logging
+import os
+
+import pandas as pd
 
-sql_file = 'sql/show.sql'
+from azure_hello.client import DBClient
+from azure_hello.instrumentation import HistogramExporter, add_hook
+from azure_hello.pool import close_all_pools
+from azure_hello.runner import load_scripts, print_report, run_scripts
+from azure_hello.schema import refresh_snapshot
 
-sql_query = open(sql_file, 'r').read()
+parser = argparse.ArgumentParser(description="Run SQL scripts against the Azure SQL database.")
+parser.add_argument("source", nargs="?", default="sql/manifest.json",
+                    help="Directory of .sql files or a JSON manifest with dependencies (default: sql/manifest.json)")
+parser.add_argument("--workers", type=int, default=4, help="Scripts to run in parallel (one pooled connection each)")
+parser.add_argument("--no-schema", action="store_true", help="Skip refreshing and printing the schema snapshot")
+parser.add_argument("--metrics", action="store_true", help="Print per-phase timing histograms at the end")
+args = parser.parse_args()
 
-client = DBClient()
-results = client.execute_sql(sql_query)
-print(results)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s")
+exporter = add_hook(HistogramExporter()) if args.metrics else None
 
-sql_file = 'sql/create_user.sql'
-sql_query = open(sql_file, 'r').read()
-results = client.execute_sql(sql_query)
-print(results)
+client = DBClient(pooled=True, pool_max_size=args.workers)
+try:
+    if not args.no_schema:
+        # Replaces running sql/show.sql every time: only tables changed since the last snapshot are re-read.
+        print(pd.DataFrame(list(refresh_snapshot(client).rows())))
 
-sql_file = 'sql/query_users.sql'
-sql_query = open(sql_file, 'r').read()
-results = client.execute_sql(sql_query)
-print(results)
+    results = run_scripts(load_scripts(args.source), client=client, max_workers=args.workers)
+finally:
+    close_all_pools()
+for result in results:
+    if result.results:
+        print(f"\n--- {result.path} ---")
+        for frame in result.results:
+            print(frame)
+print_report(results)
+if exporter is not None:
+    print()
+    print(exporter.render(), end="")
 
-client.close()
+if any(result.status != "ok" for result in results):
+    raise SystemExit(1)
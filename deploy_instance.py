@@ -1,14 +1,21 @@
+import argparse
+import json
 import os
 import random
 import string
 import subprocess
-from azure.identity import DefaultAzureCredential
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.containerinstance import ContainerInstanceManagementClient
 from azure.mgmt.containerinstance.models import (
     ContainerGroup,
     Container,
+    ContainerGroupIdentity,
+    ContainerHttpGet,
     ContainerPort,
+    ContainerProbe,
     EnvironmentVariable,
     ImageRegistryCredential,
     IpAddress,
@@ -16,13 +23,16 @@ from azure.mgmt.containerinstance.models import (
     Port,
     ResourceRequests,
     ResourceRequirements,
+    ResourceIdentityType,
+    UserAssignedIdentities,
 )
-from azure.core.exceptions import ClientAuthenticationError, HttpResponseError
+from azure.core.exceptions import ClientAuthenticationError, HttpResponseError, ResourceNotFoundError
+
+from azure_hello.azure_context import get_client, get_subscription_id
 
 # --- Configuration ---
 # Replace with your actual values or fetch dynamically
-# If AZURE_SUBSCRIPTION_ID is not set, it will try to fetch from 'az account show'
-AZURE_SUBSCRIPTION_ID = os.getenv("AZURE_SUBSCRIPTION_ID")
+# If AZURE_SUBSCRIPTION_ID is not set, the Azure CLI default subscription is used (cached, see azure_context)
 RESOURCE_GROUP_NAME = "hello-rg-04042025" # Replace if different
 ACR_LOGIN_SERVER = "helloacr04042025.azurecr.io" # Replace if different
 IMAGE_NAME = "azure-hello" # Image name in ACR
@@ -30,46 +40,29 @@ IMAGE_TAG = "latest" # Image tag
 CONTAINER_INSTANCE_NAME = "azure-hello-py-sdk" # Name for the ACI
 DNS_NAME_LABEL_BASE = "azure-hello-app-py" # Base for the public DNS name
 CONTAINER_PORT = 8501 # Port exposed by the container (from Dockerfile)
+HEALTH_PORT = 8502 # /healthz and /readyz served by serve.py (not exposed publicly)
 CPU_CORES = 1.0
 MEMORY_IN_GB = 1.5
+POLL_INTERVAL = 5 # Seconds between progress reports while instances deploy
+READY_TIMEOUT = 600 # Seconds a provisioned instance gets to reach a running, stable container
+READY_STABLE_SECONDS = 45 # Running this long without restarts or failed probes counts as ready (longer than the probe windows)
+# App settings copied from the deploying shell (source env.sh) into every container.
+# The SQL password is not among them: the container reads it from Key Vault with its managed identity.
+APP_ENV_VARS = [
+    "DB_BACKEND", "SQL_SERVER_NAME", "SQL_DB_NAME", "SQL_ADMIN", "KEYVAULT_NAME", "SECRET_BACKEND",
+    "SECRET_CACHE_TTL", "DB_RETRY_ATTEMPTS", "DB_CIRCUIT_FAILURES", "DB_CIRCUIT_RESET", "UI_CACHE_TTL", "LOG_LEVEL",
+]
+REQUIRED_APP_ENV_VARS = ["SQL_SERVER_NAME", "SQL_DB_NAME", "SQL_ADMIN", "KEYVAULT_NAME"]
+# User-assigned identity shared by every instance; create it and grant it Key Vault access once
+# with the create_app_identity and grant_app_identity aliases in env.sh.
+APP_IDENTITY_NAME = os.environ.get("APP_IDENTITY_NAME", "azure-hello-identity")
 
 # --- Helper Functions ---
 
-def get_subscription_id(credential):
-    """Gets the subscription ID from env or Azure CLI."""
-    subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID")
-    if subscription_id:
-        print(f"Using Subscription ID from environment: {subscription_id}")
-        return subscription_id
-
-    print("Warning: AZURE_SUBSCRIPTION_ID environment variable not set.")
-    print("Attempting to fetch default subscription ID from Azure CLI...")
-    try:
-        result = subprocess.run(
-            ["az", "account", "show", "--query", "id", "-o", "tsv"],
-            capture_output=True, text=True, check=True, shell=False
-        )
-        subscription_id = result.stdout.strip()
-        if not subscription_id:
-            print("Error: Azure CLI did not return a subscription ID.")
-            return None
-        print(f"Successfully fetched subscription ID from Azure CLI: {subscription_id}")
-        return subscription_id
-    except FileNotFoundError:
-        print("Error: Azure CLI ('az') command not found.")
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Error: Azure CLI command failed: {e}")
-        print(f"Stderr: {e.stderr.strip()}")
-        return None
-    except Exception as e:
-        print(f"An unexpected error occurred while running Azure CLI: {e}")
-        return None
-
-def get_resource_group_location(credential, subscription_id, rg_name):
+def get_resource_group_location(subscription_id, rg_name):
     """Gets the location of the specified resource group."""
     try:
-        resource_client = ResourceManagementClient(credential, subscription_id)
+        resource_client = get_client(ResourceManagementClient, subscription_id)
         rg = resource_client.resource_groups.get(rg_name)
         return rg.location
     except HttpResponseError as e:
@@ -86,111 +79,344 @@ def generate_unique_dns_label(base_label):
     random_suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
     return f"{base_label}-{random_suffix}"
 
+def get_acr_credentials():
+    """Fetches the ACR admin credentials with the Azure CLI, or None if that is not possible."""
+    # Important: Enable admin user on ACR to allow ACI to pull image
+    # You might need to run: `az acr update -n <your_acr_name> --admin-enabled true`
+    # For production, consider service principals or managed identities instead of admin user.
+    print("Fetching ACR credentials (requires admin user enabled on ACR)...")
+    try:
+        # Ensure you are logged into Azure CLI
+        # This assumes the user running the script has permission to get ACR credentials
+        cred_result = subprocess.run(
+            ["az", "acr", "credential", "show", "--name", ACR_LOGIN_SERVER.split('.')[0], "--query", "[username, passwords[0].value]", "-o", "tsv"],
+            capture_output=True, text=True, check=True, shell=False
+        )
+        # Use newline as delimiter based on observed 'az cli' output format
+        acr_username, acr_password = cred_result.stdout.strip().split('\n')
+        if not acr_username or not acr_password:
+             raise ValueError("Could not retrieve ACR credentials.")
+        print("Successfully fetched ACR credentials.")
+        return [
+            ImageRegistryCredential(
+                server=ACR_LOGIN_SERVER,
+                username=acr_username,
+                password=acr_password
+            )
+        ]
+    except FileNotFoundError:
+        print("Error: Azure CLI ('az') command not found. Needed to fetch ACR credentials.")
+        print("Hint: You might need to manually enable the admin user on the ACR and provide credentials.")
+    except subprocess.CalledProcessError as e:
+        print(f"Error fetching ACR credentials: {e}")
+        print(f"Stderr: {e.stderr.strip()}")
+        print("Hint: Ensure the ACR admin user is enabled ('az acr update -n <acr_name> --admin-enabled true') and you have permissions.")
+    except Exception as e:
+         print(f"An unexpected error occurred fetching ACR credentials: {e}")
+    return None # Continue without creds, might fail if image is private
+
+def get_app_identity():
+    """(resource ID, client ID) of the app's user-assigned identity, fetched with the Azure CLI."""
+    try:
+        result = subprocess.run(
+            ["az", "identity", "show", "--name", APP_IDENTITY_NAME, "--resource-group", RESOURCE_GROUP_NAME,
+             "--query", "[id, clientId]", "-o", "tsv"],
+            capture_output=True, text=True, check=True, shell=False,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("Azure CLI ('az') command not found. Needed to look up the app identity.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(
+            f"Managed identity '{APP_IDENTITY_NAME}' not found: {e.stderr.strip()}. "
+            "Hint: run create_app_identity and grant_app_identity from env.sh once."
+        )
+    identity_id, client_id = result.stdout.strip().split("\n")
+    return identity_id, client_id
+
+def app_environment(identity_client_id):
+    """Environment variables for the app container; without the database settings /readyz never passes."""
+    missing = [name for name in REQUIRED_APP_ENV_VARS if not os.environ.get(name)]
+    if missing:
+        raise RuntimeError(f"Environment variables {', '.join(missing)} are not set. Please source env.sh first.")
+    variables = [EnvironmentVariable(name=name, value=os.environ[name]) for name in APP_ENV_VARS if os.environ.get(name)]
+    variables.append(EnvironmentVariable(name="AZURE_CREDENTIAL", value="managed_identity"))
+    # Selects the user-assigned identity; the group has no system-assigned one.
+    variables.append(EnvironmentVariable(name="AZURE_CLIENT_ID", value=identity_client_id))
+    return variables
+
+def build_container_group(name, location, image_registry_creds, environment_variables=None, identity_id=None):
+    """Describes one container group running the app image."""
+    container_resource_requests = ResourceRequests(memory_in_gb=MEMORY_IN_GB, cpu=CPU_CORES)
+    container_resource_requirements = ResourceRequirements(requests=container_resource_requests)
+
+    container = Container(
+        name=name,
+        image=f"{ACR_LOGIN_SERVER}/{IMAGE_NAME}:{IMAGE_TAG}",
+        resources=container_resource_requirements,
+        ports=[ContainerPort(port=CONTAINER_PORT), ContainerPort(port=HEALTH_PORT)],
+        environment_variables=environment_variables,
+        # Traffic only reaches the instance once the warm-up has connected to the database.
+        readiness_probe=ContainerProbe(
+            http_get=ContainerHttpGet(path="/readyz", port=HEALTH_PORT),
+            initial_delay_seconds=5, period_seconds=5, timeout_seconds=3, failure_threshold=3,
+        ),
+        liveness_probe=ContainerProbe(
+            http_get=ContainerHttpGet(path="/healthz", port=HEALTH_PORT),
+            initial_delay_seconds=30, period_seconds=15, timeout_seconds=3, failure_threshold=3,
+        ),
+    )
+
+    return ContainerGroup(
+        location=location,
+        containers=[container],
+        os_type=OperatingSystemTypes.LINUX,
+        restart_policy="Always", # Or "OnFailure", "Never"
+        ip_address=IpAddress(
+            ports=[Port(protocol="TCP", port=CONTAINER_PORT)],
+            type="Public", # Public IP address
+            dns_name_label=generate_unique_dns_label(DNS_NAME_LABEL_BASE)
+        ),
+        image_registry_credentials=image_registry_creds, # Add credentials if fetched
+        # Pre-granted "Key Vault Secrets User", so the app can read the SQL password as soon as it starts.
+        identity=ContainerGroupIdentity(
+            type=ResourceIdentityType.USER_ASSIGNED,
+            user_assigned_identities={identity_id: UserAssignedIdentities()},
+        ) if identity_id else None,
+    )
+
+def instance_specs(replicas=1, regions=None, spec_path=None, default_location=None):
+    """List of {"name", "location"} to deploy.
+
+    A spec file is a JSON list of such objects. Otherwise `replicas` instances
+    are placed in each region (the resource group's location by default).
+    One instance in the default location keeps the historical name.
+    """
+    if spec_path:
+        with open(spec_path, "r") as file:
+            specs = json.load(file)
+        for spec in specs:
+            spec.setdefault("location", default_location)
+        return specs
+    regions = regions or [default_location]
+    if replicas == 1 and regions == [default_location]:
+        return [{"name": CONTAINER_INSTANCE_NAME, "location": default_location}]
+    specs = []
+    for region in regions:
+        for index in range(replicas):
+            suffix = f"{region}-{index}" if len(regions) > 1 else str(index)
+            specs.append({"name": f"{CONTAINER_INSTANCE_NAME}-{suffix}", "location": region})
+    return specs
+
 # --- Main Deployment Logic ---
 
-def deploy_container_instance():
-    """Deploys the container instance to Azure."""
+class InstanceDeployment:
+    """Tracks one container group from its create call to a final state.
+
+    creating (ARM provisioning) -> starting (container coming up) -> ready or failed.
+    """
+
+    def __init__(self, name, location):
+        self.name = name
+        self.location = location
+        self.existed = False
+        self.poller = None
+        self.status = "pending"
+        self.error = None
+        self.fqdn = None
+        self.started_at = None
+        self.seconds = None
+        self.provisioned_at = None
+        self.container_state = None
+        self.running_since = None
+        self.restarts = None
+        self.probe_failures = None
+
+def _start(aci_client, deployment, image_registry_creds, environment_variables, identity_id):
+    # Remember whether the group is new, so a rollback never deletes a pre-existing instance.
+    try:
+        aci_client.container_groups.get(RESOURCE_GROUP_NAME, deployment.name)
+        deployment.existed = True
+    except ResourceNotFoundError:
+        deployment.existed = False
+    group = build_container_group(deployment.name, deployment.location, image_registry_creds,
+                                  environment_variables, identity_id)
+    deployment.started_at = time.monotonic()
+    deployment.poller = aci_client.container_groups.begin_create_or_update(RESOURCE_GROUP_NAME, deployment.name, group)
+    deployment.status = "creating"
+
+def _collect(deployment):
+    try:
+        created_group = deployment.poller.result()
+    except Exception as e:
+        deployment.status = "failed"
+        deployment.error = str(e).splitlines()[0]
+    else:
+        state = getattr(created_group, "provisioning_state", None) or "Succeeded"
+        # Provisioned only means ACI accepted the group; _check_started waits for the container itself.
+        deployment.status = "starting" if state == "Succeeded" else "failed"
+        deployment.error = None if deployment.status == "starting" else f"provisioning state {state}"
+        deployment.provisioned_at = time.monotonic()
+        if created_group.ip_address and created_group.ip_address.fqdn:
+            deployment.fqdn = created_group.ip_address.fqdn
+
+def _probe_failures(view):
+    return sum(event.count or 1 for event in view.events or []
+               if event.name == "Unhealthy" or "probe failed" in (event.message or "").lower())
+
+def _check_started(aci_client, deployment):
+    """Marks a provisioned instance ready once its container has run without restarts or failed probes for a while."""
+    now = time.monotonic()
     try:
-        # --- Authentication ---
-        print("Authenticating...")
-        credential = DefaultAzureCredential()
+        group = aci_client.container_groups.get(RESOURCE_GROUP_NAME, deployment.name)
+        view = group.containers[0].instance_view
+    except HttpResponseError:
+        view = None # Try again on the next poll
+    if view is not None and view.current_state is not None:
+        deployment.container_state = view.current_state.state
+        restarts = view.restart_count or 0
+        probe_failures = _probe_failures(view)
+        if deployment.restarts is None:
+            # A new group starts from zero; an updated one may carry counts from before this run.
+            deployment.restarts = restarts if deployment.existed else 0
+            deployment.probe_failures = probe_failures
+        if restarts > deployment.restarts:
+            deployment.status = "failed"
+            deployment.error = f"container restarted {restarts} time(s): {view.current_state.detail_status or deployment.container_state}"
+            return
+        if deployment.container_state != "Running" or probe_failures > deployment.probe_failures:
+            # Failing readiness probes (e.g. /readyz still 503) restart the stability window.
+            deployment.running_since = None
+            deployment.probe_failures = probe_failures
+        elif deployment.running_since is None:
+            deployment.running_since = now
+        elif now - deployment.running_since >= READY_STABLE_SECONDS:
+            deployment.status = "ready"
+            return
+    if now - deployment.provisioned_at > READY_TIMEOUT:
+        deployment.status = "failed"
+        deployment.error = f"not ready within {READY_TIMEOUT}s (container {deployment.container_state or 'not started'})"
+
+def _progress(deployment):
+    if deployment.status == "creating":
+        return deployment.poller.status()
+    return f"container {deployment.container_state or 'pending'}"
+
+def deploy_many(aci_client, specs, image_registry_creds, rollback=True, environment_variables=None, identity_id=None):
+    """Starts every create at once, polls them together and rolls back new groups if any fails.
+
+    An instance only counts as ready once its container has been running
+    stably, not when ARM reports it provisioned. Total time is roughly that
+    of the slowest instance. Returns the deployments.
+    """
+    deployments = [InstanceDeployment(spec["name"], spec["location"]) for spec in specs]
+    print(f"Creating {len(deployments)} container group(s) in resource group '{RESOURCE_GROUP_NAME}'...")
+    with ThreadPoolExecutor(max_workers=max(1, len(deployments))) as executor:
+        # The initial PUT of each begin_create_or_update is itself a blocking HTTP call.
+        for deployment, future in [(d, executor.submit(_start, aci_client, d, image_registry_creds, environment_variables, identity_id)) for d in deployments]:
+            try:
+                future.result()
+                print(f"- {deployment.name} ({deployment.location}): {'updating' if deployment.existed else 'creating'}")
+            except Exception as e:
+                deployment.status = "failed"
+                deployment.error = str(e).splitlines()[0]
+                print(f"- {deployment.name} ({deployment.location}): failed to start: {deployment.error}")
+
+    start = time.monotonic()
+    pending = [deployment for deployment in deployments if deployment.poller is not None]
+    while pending:
+        for deployment in [d for d in pending if d.status == "creating" and d.poller.done()]:
+            _collect(deployment)
+            if deployment.status == "starting":
+                print(f"[{time.monotonic() - start:6.0f}s] {deployment.name}: provisioned, waiting for the container")
+        for deployment in [d for d in pending if d.status == "starting"]:
+            _check_started(aci_client, deployment)
+        for deployment in [d for d in pending if d.status in ("ready", "failed")]:
+            pending.remove(deployment)
+            deployment.seconds = time.monotonic() - deployment.started_at
+            detail = deployment.error or (f"http://{deployment.fqdn}:{CONTAINER_PORT}" if deployment.fqdn else "")
+            print(f"[{time.monotonic() - start:6.0f}s] {deployment.name}: {deployment.status} after {deployment.seconds:.0f}s {detail}")
+        if pending:
+            print(f"[{time.monotonic() - start:6.0f}s] waiting for: {', '.join(f'{d.name} ({_progress(d)})' for d in pending)}")
+            time.sleep(POLL_INTERVAL)
+
+    failed = [deployment for deployment in deployments if deployment.status != "ready"]
+    if failed and rollback:
+        roll_back(aci_client, deployments)
+    return deployments
+
+def roll_back(aci_client, deployments):
+    """Deletes the container groups this run created (pre-existing ones are left as they are)."""
+    created = [d for d in deployments if d.poller is not None and not d.existed]
+    if not created:
+        return
+    print(f"Rolling back {len(created)} newly created container group(s)...")
+    pollers = []
+    for deployment in created:
+        try:
+            pollers.append((deployment, aci_client.container_groups.begin_delete(RESOURCE_GROUP_NAME, deployment.name)))
+        except ResourceNotFoundError:
+            deployment.status = "rolled back"
+    for deployment, poller in pollers:
+        try:
+            poller.result()
+            deployment.status = "rolled back"
+        except Exception as e:
+            print(f"Could not delete {deployment.name}: {e}. Delete it manually.")
+    for deployment in deployments:
+        if deployment.existed and deployment.status != "ready":
+            print(f"Note: {deployment.name} existed before this run and was not rolled back.")
+
+def print_summary(deployments):
+    print("\n--- Deployment summary ---")
+    for deployment in deployments:
+        seconds = f"{deployment.seconds:6.0f}s" if deployment.seconds is not None else "      -"
+        target = f"http://{deployment.fqdn}:{CONTAINER_PORT}" if deployment.fqdn else deployment.error or ""
+        print(f"{deployment.name:40} {deployment.location:14} {deployment.status:12} {seconds}  {target}")
+
+def deploy_container_instance(replicas=1, regions=None, spec_path=None, rollback=True):
+    """Deploys the container instance(s) to Azure. Returns True if every instance is ready."""
+    try:
+        # --- App settings and identity for the containers ---
+        try:
+            identity_id, identity_client_id = get_app_identity()
+            environment_variables = app_environment(identity_client_id)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            print("Deployment aborted: the containers could not reach the database.")
+            return False
 
         # --- Get Subscription ID ---
-        subscription_id = get_subscription_id(credential)
-        if not subscription_id:
+        try:
+            subscription_id = get_subscription_id()
+        except RuntimeError as e:
+            print(f"Error: {e}")
             print("Deployment aborted: Could not determine Subscription ID.")
-            return
+            return False
+        print(f"Using Subscription ID: {subscription_id}")
 
         # --- Get Resource Group Location ---
         print(f"Fetching location for resource group '{RESOURCE_GROUP_NAME}'...")
-        location = get_resource_group_location(credential, subscription_id, RESOURCE_GROUP_NAME)
+        location = get_resource_group_location(subscription_id, RESOURCE_GROUP_NAME)
         if not location:
             print("Deployment aborted: Could not determine resource group location.")
-            return
+            return False
         print(f"Resource group location: {location}")
 
         # --- Initialize Container Instance Client ---
         print("Initializing Container Instance client...")
-        aci_client = ContainerInstanceManagementClient(credential, subscription_id)
-
-        # --- Configure Container ---
-        print("Configuring container details...")
-        full_image_name = f"{ACR_LOGIN_SERVER}/{IMAGE_NAME}:{IMAGE_TAG}"
-        dns_name_label = generate_unique_dns_label(DNS_NAME_LABEL_BASE)
-
-        # Important: Enable admin user on ACR to allow ACI to pull image
-        # You might need to run: `az acr update -n <your_acr_name> --admin-enabled true`
-        # For production, consider service principals or managed identities instead of admin user.
-        # Fetch ACR credentials if admin user is enabled (requires 'az cli')
-        print("Fetching ACR credentials (requires admin user enabled on ACR)...")
-        try:
-            # Ensure you are logged into Azure CLI
-            # This assumes the user running the script has permission to get ACR credentials
-            cred_result = subprocess.run(
-                ["az", "acr", "credential", "show", "--name", ACR_LOGIN_SERVER.split('.')[0], "--query", "[username, passwords[0].value]", "-o", "tsv"],
-                capture_output=True, text=True, check=True, shell=False
-            )
-            # Use newline as delimiter based on observed 'az cli' output format
-            acr_username, acr_password = cred_result.stdout.strip().split('\n')
-            if not acr_username or not acr_password:
-                 raise ValueError("Could not retrieve ACR credentials.")
-            print("Successfully fetched ACR credentials.")
-            image_registry_creds = [
-                ImageRegistryCredential(
-                    server=ACR_LOGIN_SERVER,
-                    username=acr_username,
-                    password=acr_password
-                )
-            ]
-        except FileNotFoundError:
-            print("Error: Azure CLI ('az') command not found. Needed to fetch ACR credentials.")
-            print("Hint: You might need to manually enable the admin user on the ACR and provide credentials.")
-            image_registry_creds = None # Continue without creds, might fail if image is private
-        except subprocess.CalledProcessError as e:
-            print(f"Error fetching ACR credentials: {e}")
-            print(f"Stderr: {e.stderr.strip()}")
-            print("Hint: Ensure the ACR admin user is enabled ('az acr update -n <acr_name> --admin-enabled true') and you have permissions.")
-            image_registry_creds = None # Continue without creds, might fail if image is private
-        except Exception as e:
-             print(f"An unexpected error occurred fetching ACR credentials: {e}")
-             image_registry_creds = None
-
-
-        container_resource_requests = ResourceRequests(memory_in_gb=MEMORY_IN_GB, cpu=CPU_CORES)
-        container_resource_requirements = ResourceRequirements(requests=container_resource_requests)
-
-        container = Container(
-            name=CONTAINER_INSTANCE_NAME,
-            image=full_image_name,
-            resources=container_resource_requirements,
-            ports=[ContainerPort(port=CONTAINER_PORT)]
-        )
+        aci_client = get_client(ContainerInstanceManagementClient, subscription_id)
 
-        # --- Configure Container Group ---
-        group = ContainerGroup(
-            location=location,
-            containers=[container],
-            os_type=OperatingSystemTypes.LINUX,
-            restart_policy="Always", # Or "OnFailure", "Never"
-            ip_address=IpAddress(
-                ports=[Port(protocol="TCP", port=CONTAINER_PORT)],
-                type="Public", # Public IP address
-                dns_name_label=dns_name_label
-            ),
-            image_registry_credentials=image_registry_creds # Add credentials if fetched
-        )
-
-        # --- Create Container Group ---
-        print(f"Creating container group '{CONTAINER_INSTANCE_NAME}' in resource group '{RESOURCE_GROUP_NAME}'...")
-        poller = aci_client.container_groups.begin_create_or_update(RESOURCE_GROUP_NAME, CONTAINER_INSTANCE_NAME, group)
-        created_group = poller.result() # Wait for deployment to complete
-
-        print("Deployment successful!")
-        print(f"Container Instance Name: {created_group.name}")
-        if created_group.ip_address and created_group.ip_address.fqdn:
-            print(f"FQDN: http://{created_group.ip_address.fqdn}:{CONTAINER_PORT}")
-        else:
-            print("FQDN not available immediately. Check Azure portal.")
+        # --- Configure and create the container groups ---
+        specs = instance_specs(replicas, regions, spec_path, default_location=location)
+        image_registry_creds = get_acr_credentials()
+        deployments = deploy_many(aci_client, specs, image_registry_creds, rollback=rollback,
+                                  environment_variables=environment_variables, identity_id=identity_id)
+        print_summary(deployments)
+        if all(deployment.status == "ready" for deployment in deployments):
+            print("Deployment successful!")
+            return True
+        print("Deployment failed." + (" New instances were rolled back." if rollback else ""))
+        return False
 
     except ClientAuthenticationError:
         print("Error: Authentication failed.")
@@ -202,11 +428,20 @@ def deploy_container_instance():
         if "ResourceGroupNotFound" in str(e):
             print(f"Hint: Ensure the resource group '{RESOURCE_GROUP_NAME}' exists.")
         if "InvalidImage" in str(e) or "ImagePullBackOff" in str(e) or "AcrUnauthorized" in str(e):
-             print(f"Hint: Check if the image '{full_image_name}' exists and the ACR credentials/permissions are correct.")
+             print(f"Hint: Check if the image '{ACR_LOGIN_SERVER}/{IMAGE_NAME}:{IMAGE_TAG}' exists and the ACR credentials/permissions are correct.")
              print(f"Hint: Make sure the ACR admin user is enabled: 'az acr update -n {ACR_LOGIN_SERVER.split('.')[0]} --admin-enabled true'")
         # Add more specific error handling as needed
     except Exception as e:
         print(f"An unexpected error occurred during deployment: {e}")
+    return False
 
 if __name__ == "__main__":
-    deploy_container_instance() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Deploy the app image to Azure Container Instances.")
+    parser.add_argument("--replicas", type=int, default=1, help="Container groups per region")
+    parser.add_argument("--regions", help="Comma-separated Azure regions (default: the resource group's location)")
+    parser.add_argument("--spec", help='JSON list of {"name": ..., "location": ...} instances to deploy')
+    parser.add_argument("--no-rollback", action="store_true", help="Keep successfully created instances when another one fails")
+    args = parser.parse_args()
+    regions = [region.strip() for region in args.regions.split(",")] if args.regions else None
+    if not deploy_container_instance(args.replicas, regions, args.spec, rollback=not args.no_rollback):
+        sys.exit(1)
@@ -12,9 +12,37 @@ export SQL_SERVER_NAME="${APP_NAME}-sql-server"
 export SQL_DB_NAME="${APP_NAME}_db"
 export SQL_ADMIN="azureuser"
 export SQL_TIER="Basic"  # Options: Basic, Standard, Premium, GeneralPurpose, BusinessCritical, Hyperscale
+# DB_BACKEND=sqlite runs DBClient against a local SQLite file ($SQLITE_PATH, ":memory:" for in-process) instead of Azure SQL.
+export DB_BACKEND="azuresql"
+# Shared read-query cache used by DBClient(result_cache=True); set QUERY_CACHE_DIR to persist it as Parquet.
+export QUERY_CACHE_TTL=300
+export QUERY_CACHE_MAX_ENTRIES=256
+# Seconds the Streamlit users browser serves a page from st.cache_data before re-querying.
+export UI_CACHE_TTL=60
+# serve.py exposes /healthz, /readyz and /metrics on this port for Docker and ACI probes.
+export HEALTH_PORT=8502
+# Transient Azure SQL errors (failover, throttling) are retried with jittered backoff; reads only.
+export DB_RETRY_ATTEMPTS=4
+# After this many consecutive transient failures DBClient fails fast for DB_CIRCUIT_RESET seconds.
+export DB_CIRCUIT_FAILURES=5
+export DB_CIRCUIT_RESET=30
+# Log level for the azure_hello.* loggers in the CLI scripts (DEBUG also shows result cache hits).
+export LOG_LEVEL="INFO"
+
+# Azure tooling context: the CLI default subscription comes from ~/.azure/azureProfile.json; only an
+# `az account show` fallback is cached on disk for AZURE_CONTEXT_TTL seconds (azure_state.py --refresh-context).
+# AZURE_CREDENTIAL=cli (or environment, managed_identity) skips DefaultAzureCredential's source probing.
+export AZURE_CONTEXT_TTL=43200
+export AZURE_CREDENTIAL="default"
 
 # Key Vault Configuration
 export KEYVAULT_NAME="${APP_NAME}-key"
+# User-assigned identity the deployed containers use to read the SQL password from Key Vault.
+export APP_IDENTITY_NAME="${APP_NAME}-identity"
+# Where DBClient reads the SQL password: keyvault (default), env or file.
+# env reads e.g. AZURE_HELLO_SQL_SERVER_PASSWORD; file reads a JSON {secret-name: value} at $SECRET_FILE.
+export SECRET_BACKEND="keyvault"
+export SECRET_CACHE_TTL=3600
 
 alias login="az acr login --name $ACR_NAME"
 
@@ -85,6 +113,19 @@ alias get_secret='az keyvault secret show \
 --vault-name $KEYVAULT_NAME \
 --name'  # Usage: get_secret secret-name
 
+alias create_app_identity='az identity create \
+--name $APP_IDENTITY_NAME \
+--resource-group $RESOURCE_GROUP_NAME \
+--output table'
+
+# Run once after create_app_identity (and create_keyvault); every deployed instance shares this grant.
+alias grant_app_identity='az role assignment create \
+--role "Key Vault Secrets User" \
+--assignee-object-id $(az identity show --name $APP_IDENTITY_NAME --resource-group $RESOURCE_GROUP_NAME --query principalId -o tsv) \
+--assignee-principal-type ServicePrincipal \
+--scope $(az keyvault show --name $KEYVAULT_NAME --query id -o tsv) \
+--output table'
+
 alias list_secrets='az keyvault secret list \
 --vault-name $KEYVAULT_NAME \
 --output table'
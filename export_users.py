@@ -0,0 +1,27 @@
+import argparse
+import logging
+import os
+
+from azure_hello.client import DEFAULT_CHUNK_SIZE, DBClient
+from azure_hello.export import DEFAULT_OVERLAP_IDS, export_users, read_watermark
+
+# --- Configuration ---
+# Replaces running sql/query_users.sql for analytics: each run only reads users added since the last one.
+DEFAULT_OUTPUT_DIR = "exports/users"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append new rows of dbo.users to a Parquet dataset partitioned by creation date.")
+    parser.add_argument("output", nargs="?", default=DEFAULT_OUTPUT_DIR, help=f"Dataset directory (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched and written per chunk")
+    parser.add_argument("--overlap", type=int, default=DEFAULT_OVERLAP_IDS, help="Ids below the watermark re-read for rows that committed late")
+    parser.add_argument("--show-watermark", action="store_true", help="Only print the high-water mark of the last export")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s")
+    if args.show_watermark:
+        print(read_watermark(args.output) or "No export has run yet.")
+    else:
+        result = export_users(DBClient(), args.output, chunk_size=args.chunk_size, overlap=args.overlap)
+        print(f"Exported {result.rows} new users to {len(result.files)} files; watermark is id {result.last_id}.")
+        for path in result.files:
+            print(f"  {path}")
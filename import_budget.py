@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# --- Configuration ---
+# Entry points that must stay light, and the heavy packages none of them may load at import time.
+MODULES = [
+    "azure_hello",
+    "azure_hello.client",
+    "azure_hello.migrate",
+    "azure_hello.runner",
+    "azure_hello.schema",
+    "azure_hello.async_client",
+    "azure_hello.azure_context",
+    "azure_hello.warmup",
+    "azure_hello.export",
+]
+HEAVY = ["pandas", "pyarrow", "streamlit", "pyodbc", "azure.identity", "azure.keyvault.secrets"]
+DEFAULT_BUDGET_MS = 150
+
+PROBE = """
+import json, sys
+import {module}
+print(json.dumps([name for name in {heavy!r} if name in sys.modules]))
+"""
+
+
+def measure(module):
+    """Import `module` in a fresh interpreter; return (cumulative import ms, heavy modules loaded)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, ["src", os.environ.get("PYTHONPATH")])))
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY)],
+        capture_output=True, text=True, env=env,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr}")
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    cumulative_us = 0
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == module.split(".")[0] or name.strip() == module:
+            try:
+                cumulative_us = max(cumulative_us, int(cumulative))
+            except ValueError:
+                pass
+    return cumulative_us / 1000, json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that azure_hello modules import fast and without heavy dependencies.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Maximum cumulative import time per module")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to check")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        milliseconds, heavy = measure(module)
+        problems = []
+        if milliseconds > args.budget_ms:
+            problems.append(f"over budget ({args.budget_ms:.0f} ms)")
+        if heavy:
+            problems.append(f"loads {', '.join(heavy)}")
+        failed |= bool(problems)
+        print(f"{module:28} {milliseconds:8.1f} ms  {'; '.join(problems) or 'ok'}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
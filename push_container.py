@@ -1,74 +1,212 @@
+import argparse
+import collections
+import fnmatch
+import hashlib
+import os
 import subprocess
 import sys
-import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # --- Configuration ---
 # Retrieved from azure_state.py output or Azure portal
 ACR_NAME = "helloacr04042025"
 # Desired repository name within ACR
 REPOSITORY_NAME = "azure-hello"
-# Desired tag for the image
+# Moving tag that deploy_instance.py pulls; every build is also tagged by its content hash
 IMAGE_TAG = "latest"
 # Path to the Dockerfile directory (current directory)
 DOCKERFILE_PATH = "."
+# Everything the Dockerfile COPYs; the image tag is derived from these files only
+CONTEXT_PATHS = ["Dockerfile", "pyproject.toml", "uv.lock", "ui.py", "serve.py", "src"]
+CONTEXT_IGNORE = ["__pycache__", "*.pyc", "*.pyo", "*.pyd", "*.egg-info"]
 
 # Construct the full image name for ACR
 ACR_LOGIN_SERVER = f"{ACR_NAME}.azurecr.io"
-FULL_IMAGE_NAME = f"{ACR_LOGIN_SERVER}/{REPOSITORY_NAME}:{IMAGE_TAG}"
+IMAGE_REPOSITORY = f"{ACR_LOGIN_SERVER}/{REPOSITORY_NAME}"
+FULL_IMAGE_NAME = f"{IMAGE_REPOSITORY}:{IMAGE_TAG}"
+
+_print_lock = threading.Lock()
+_started = time.monotonic()
+# Lines of output kept per step for the failure report; the rest is only streamed.
+TAIL_LINES = 40
+STEP_TIMINGS = []
 
-def run_command(command, description):
-    """Runs a shell command and handles errors."""
-    print(f"--- Running: {description} ---")
-    print(f"$ {' '.join(command)}")
+def _emit(label, line, file=sys.stdout):
+    with _print_lock:
+        print(f"[{time.monotonic() - _started:7.1f}s] {label} | {line}", file=file, flush=True)
+
+def run_command(command, description, env=None, label=None):
+    """Runs a command, streaming its output line by line, and handles errors."""
+    label = label or command[0]
+    _emit(label, f"--- Running: {description} ---")
+    _emit(label, f"$ {' '.join(command)}")
+    start = time.monotonic()
+    tail = collections.deque(maxlen=TAIL_LINES)
     try:
         # Use shell=False for security and pass command as a list
-        process = subprocess.run(command, check=True, text=True, capture_output=True, shell=False)
-        print(process.stdout)
-        print(f"--- Success: {description} ---\n")
-        return True
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+            bufsize=1, shell=False, env=env,
+        )
+        with process.stdout:
+            for line in process.stdout:
+                line = line.rstrip("\n")
+                tail.append(line)
+                _emit(label, line)
+        returncode = process.wait()
     except FileNotFoundError:
-        print(f"Error: Command '{command[0]}' not found. Is it installed and in your PATH?", file=sys.stderr)
-        return False
-    except subprocess.CalledProcessError as e:
-        print(f"Error running command: {' '.join(e.cmd)}", file=sys.stderr)
-        print(f"Return code: {e.returncode}", file=sys.stderr)
-        print(f"Stderr: {e.stderr.strip()}", file=sys.stderr)
-        print(f"Stdout: {e.stdout.strip()}", file=sys.stderr)
-        print(f"--- Failed: {description} ---\n", file=sys.stderr)
+        _emit(label, f"Error: Command '{command[0]}' not found. Is it installed and in your PATH?", file=sys.stderr)
         return False
     except Exception as e:
-        print(f"An unexpected error occurred: {e}", file=sys.stderr)
-        print(f"--- Failed: {description} ---\n", file=sys.stderr)
+        _emit(label, f"An unexpected error occurred: {e}", file=sys.stderr)
+        _emit(label, f"--- Failed: {description} ---", file=sys.stderr)
+        return False
+    finally:
+        STEP_TIMINGS.append((description, time.monotonic() - start))
+    seconds = time.monotonic() - start
+    if returncode != 0:
+        _emit(label, f"Error running command: {' '.join(command)}", file=sys.stderr)
+        _emit(label, f"Return code: {returncode}", file=sys.stderr)
+        for line in tail:
+            _emit(label, f"  {line}", file=sys.stderr)
+        _emit(label, f"--- Failed: {description} ({seconds:.1f}s) ---", file=sys.stderr)
         return False
+    _emit(label, f"--- Success: {description} ({seconds:.1f}s) ---")
+    return True
 
-def push_container():
-    """Builds the Docker image and pushes it to ACR."""
+def run_parallel(*steps):
+    """Run independent (command, description[, options]) steps concurrently; returns their results in order."""
+    with ThreadPoolExecutor(max_workers=len(steps)) as executor:
+        futures = [executor.submit(run_command, step[0], step[1], **(step[2] if len(step) > 2 else {})) for step in steps]
+        return [future.result() for future in futures]
 
-    # 1. Login to ACR (Requires Azure CLI login)
-    login_command = ["az", "acr", "login", "--name", ACR_NAME]
-    if not run_command(login_command, f"Login to ACR: {ACR_NAME}"):
-        print("ACR login failed. Please ensure you are logged in with 'az login' and have permissions.", file=sys.stderr)
-        sys.exit(1)
+def print_timings():
+    print("\n--- Step durations ---")
+    for description, seconds in STEP_TIMINGS:
+        print(f"{seconds:8.1f}s  {description}")
+    print(f"{time.monotonic() - _started:8.1f}s  total")
+
+def _context_files(root):
+    for path in CONTEXT_PATHS:
+        full_path = os.path.join(root, path)
+        if os.path.isfile(full_path):
+            yield path
+            continue
+        for directory, dirnames, filenames in os.walk(full_path):
+            dirnames[:] = sorted(name for name in dirnames if not _ignored(name))
+            for name in sorted(filenames):
+                if not _ignored(name):
+                    yield os.path.relpath(os.path.join(directory, name), root).replace(os.sep, "/")
+
+def _ignored(name):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in CONTEXT_IGNORE)
 
-    # 2. Build the Docker image
+def context_digest(root=DOCKERFILE_PATH):
+    """sha256 over the path and content of every file the image is built from."""
+    digest = hashlib.sha256()
+    for path in sorted(_context_files(root)):
+        digest.update(path.encode() + b"\0")
+        with open(os.path.join(root, path), "rb") as file:
+            digest.update(hashlib.sha256(file.read()).digest())
+    return digest.hexdigest()
+
+def content_tag(root=DOCKERFILE_PATH):
+    return f"ctx-{context_digest(root)[:16]}"
+
+def _registry_client():
+    from azure.containerregistry import ContainerRegistryClient
+    from azure_hello.azure_context import get_credential
+    return ContainerRegistryClient(f"https://{ACR_LOGIN_SERVER}", get_credential())
+
+def registry_digest(tag):
+    """Manifest digest of REPOSITORY_NAME:tag in ACR, or None if the tag does not exist."""
+    from azure.core.exceptions import ResourceNotFoundError
+    with _registry_client() as client:
+        try:
+            return client.get_tag_properties(REPOSITORY_NAME, tag).digest
+        except ResourceNotFoundError:
+            return None
+
+def point_tag_at(tag, source_tag):
+    """Re-tag an image already in ACR on the server side; no layers move and the digest is unchanged."""
+    # Uploading the manifest through the SDK would re-serialize it and give the tag a new digest.
+    command = [
+        "az", "acr", "import", "--name", ACR_NAME,
+        "--source", f"{IMAGE_REPOSITORY}:{source_tag}",
+        "--image", f"{REPOSITORY_NAME}:{tag}", "--force",
+    ]
+    if not run_command(command, f"Point {REPOSITORY_NAME}:{tag} at {source_tag}", label="retag"):
+        raise RuntimeError(f"az acr import failed for {REPOSITORY_NAME}:{tag}")
+
+def push_container(force=False):
+    """Builds the Docker image and pushes it to ACR, unless ACR already has an image of this exact content."""
+
+    # 1. Hash the build context; identical inputs produce an identical tag
     # Ensure Dockerfile exists
     if not os.path.exists(os.path.join(DOCKERFILE_PATH, 'Dockerfile')):
         print(f"Error: Dockerfile not found in directory '{DOCKERFILE_PATH}'", file=sys.stderr)
         sys.exit(1)
+    tag = content_tag()
+    content_image = f"{IMAGE_REPOSITORY}:{tag}"
+    print(f"Build context tag: {tag}")
+
+    # 2. Skip build and push when the registry already has this content
+    existing = None
+    if not force:
+        try:
+            existing = registry_digest(tag)
+        except Exception as e:
+            print(f"Could not check {ACR_LOGIN_SERVER} for {tag}, building anyway: {e}", file=sys.stderr)
+    if existing:
+        print(f"{content_image} is already in the registry ({existing}); skipping build and push.")
+        try:
+            if registry_digest(IMAGE_TAG) != existing:
+                print(f"Pointing {FULL_IMAGE_NAME} at {tag}...")
+                point_tag_at(IMAGE_TAG, tag)
+        except Exception as e:
+            print(f"Could not move {FULL_IMAGE_NAME} to {tag}: {e}. Deploy {content_image} instead.", file=sys.stderr)
+        print(f"Image name: {FULL_IMAGE_NAME}")
+        return
 
-    build_command = ["docker", "build", "-t", FULL_IMAGE_NAME, DOCKERFILE_PATH]
-    if not run_command(build_command, f"Build Docker image: {FULL_IMAGE_NAME}"):
+    # 3. Login to ACR (Requires Azure CLI login) while the image builds; the build does not need the registry
+    login_command = ["az", "acr", "login", "--name", ACR_NAME]
+    # Build the Docker image with BuildKit (needed for the uv cache mount in the Dockerfile)
+    build_command = [
+        "docker", "build", "-t", content_image, "-t", FULL_IMAGE_NAME,
+        "--label", f"org.opencontainers.image.revision={tag}", DOCKERFILE_PATH,
+    ]
+    build_env = dict(os.environ, DOCKER_BUILDKIT="1", BUILDKIT_PROGRESS="plain")
+    logged_in, built = run_parallel(
+        (login_command, f"Login to ACR: {ACR_NAME}", {"label": "login"}),
+        (build_command, f"Build Docker image: {content_image}", {"env": build_env, "label": "build"}),
+    )
+    if not logged_in:
+        print("ACR login failed. Please ensure you are logged in with 'az login' and have permissions.", file=sys.stderr)
+    if not built:
         print("Docker build failed.", file=sys.stderr)
+    if not (logged_in and built):
+        print_timings()
         sys.exit(1)
 
-    # 3. Push the Docker image to ACR
-    push_command = ["docker", "push", FULL_IMAGE_NAME]
-    if not run_command(push_command, f"Push Docker image to {ACR_LOGIN_SERVER}"):
-        print("Docker push failed.", file=sys.stderr)
-        sys.exit(1)
+    # 4. Push the Docker image to ACR; the second tag only uploads a manifest
+    for image in (content_image, FULL_IMAGE_NAME):
+        if not run_command(["docker", "push", image], f"Push Docker image {image}", label="push"):
+            print("Docker push failed.", file=sys.stderr)
+            print_timings()
+            sys.exit(1)
 
     print("--- Docker image build and push completed successfully! ---")
-    print(f"Image name: {FULL_IMAGE_NAME}")
+    print(f"Image name: {FULL_IMAGE_NAME} ({tag})")
+    print_timings()
 
 if __name__ == "__main__":
-    push_container() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the app image and push it to ACR if its content is new.")
+    parser.add_argument("--force", action="store_true", help="Build and push even if the registry already has this content")
+    parser.add_argument("--print-tag", action="store_true", help="Only print the content tag of the current build context")
+    args = parser.parse_args()
+    if args.print_tag:
+        print(content_tag())
+    else:
+        push_container(force=args.force)
@@ -0,0 +1,18 @@
+import logging
+import os
+import sys
+
+from streamlit.web import cli as stcli
+
+from azure_hello.warmup import start
+
+# --- Configuration ---
+# Streamlit runs in this process, so the warm-up fills the same module, secret
+# and connection pool caches the app uses, before the first visitor arrives.
+STREAMLIT_ARGS = ["run", "ui.py", "--server.address=0.0.0.0", "--server.port=8501"]
+
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s")
+    start()
+    sys.argv = ["streamlit", *STREAMLIT_ARGS, *sys.argv[1:]]
+    sys.exit(stcli.main())
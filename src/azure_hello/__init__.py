@@ -1 +1,8 @@
-from .main_ui import main_ui
\ No newline at end of file
+def __getattr__(name):
+    # Importing the package must not pull in streamlit (and through it pandas);
+    # CLI scripts only need the DB modules.
+    if name == "main_ui":
+        from .main_ui import main_ui
+        globals()["main_ui"] = main_ui
+        return main_ui
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
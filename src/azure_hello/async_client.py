@@ -0,0 +1,63 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .client import DBClient
+
+
+class AsyncDBClient:
+    """asyncio front end for a pooled DBClient.
+
+    pyodbc calls block, so they run on a bounded thread pool sized to the
+    connection pool; independent queries awaited together (see `gather`) each
+    get their own pooled connection and overlap on the server.
+    """
+
+    def __init__(self, client, max_workers=None):
+        if client.pool is None:
+            raise ValueError("AsyncDBClient needs a pooled DBClient (DBClient(pooled=True)).")
+        self.client = client
+        self.max_workers = max_workers or client.pool.max_size
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="azure-hello-db")
+
+    @classmethod
+    async def create(cls, max_workers=5, **client_options):
+        # DBClient() may fetch the SQL password, so build it off the event loop too.
+        client_options.setdefault("pool_max_size", max_workers)
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(None, partial(DBClient, pooled=True, **client_options))
+        return cls(client, max_workers=max_workers)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def connect(self):
+        return await self._run(self.client.connect)
+
+    async def execute(self, sql, params=None):
+        return await self._run(self.client.execute, sql, params)
+
+    async def execute_sql(self, sql_script, columnar=False):
+        return await self._run(self.client.execute_sql, sql_script, columnar=columnar)
+
+    async def bulk_insert(self, table, rows, **options):
+        return await self._run(self.client.bulk_insert, table, rows, **options)
+
+    async def gather(self, *sql_scripts, return_exceptions=False):
+        """Run independent scripts concurrently and return their results in order."""
+        return await asyncio.gather(
+            *(self.execute_sql(sql_script) for sql_script in sql_scripts),
+            return_exceptions=return_exceptions,
+        )
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+        self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
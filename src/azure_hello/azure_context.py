@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "azure_hello", "context.json")
+DEFAULT_TTL = 12 * 3600
+AZURE_PROFILE_PATH = os.path.join(os.environ.get("AZURE_CONFIG_DIR") or os.path.join(os.path.expanduser("~"), ".azure"), "azureProfile.json")
+
+_lock = threading.Lock()
+_credential = None
+_clients = {}
+
+
+def _cache_path():
+    return os.environ.get("AZURE_CONTEXT_CACHE", DEFAULT_CACHE_PATH)
+
+
+def _cache_ttl():
+    return float(os.environ.get("AZURE_CONTEXT_TTL", DEFAULT_TTL))
+
+
+def get_credential():
+    """One credential per process, so every client shares its token cache.
+
+    AZURE_CREDENTIAL=cli|environment|managed_identity skips DefaultAzureCredential's
+    probing of every credential source on first use.
+    """
+    global _credential
+    with _lock:
+        if _credential is None:
+            import azure.identity as identity
+            kind = os.environ.get("AZURE_CREDENTIAL", "default").lower()
+            credentials = {
+                "cli": identity.AzureCliCredential,
+                "environment": identity.EnvironmentCredential,
+                "managed_identity": identity.ManagedIdentityCredential,
+                "default": identity.DefaultAzureCredential,
+            }
+            if kind not in credentials:
+                raise ValueError(f"Unknown AZURE_CREDENTIAL '{kind}', expected one of {sorted(credentials)}.")
+            if kind == "managed_identity":
+                # AZURE_CLIENT_ID selects a user-assigned identity (deploy_instance.py sets it).
+                _credential = identity.ManagedIdentityCredential(client_id=os.environ.get("AZURE_CLIENT_ID"))
+            else:
+                _credential = credentials[kind]()
+        return _credential
+
+
+def _read_cache():
+    try:
+        with open(_cache_path(), "r") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if time.time() - cached.get("resolved_at", 0) > _cache_ttl():
+        return None
+    return cached.get("subscription_id")
+
+
+def _write_cache(subscription_id):
+    path = _cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as file:
+            json.dump({"subscription_id": subscription_id, "resolved_at": time.time()}, file)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logger.warning("Could not cache the subscription ID at %s: %s", path, e)
+
+
+def _default_from_profile():
+    # The Azure CLI keeps its default subscription here; reading it avoids starting `az`.
+    try:
+        with open(AZURE_PROFILE_PATH, "r", encoding="utf-8-sig") as file:
+            profile = json.load(file)
+    except (OSError, ValueError):
+        return None
+    for subscription in profile.get("subscriptions", []):
+        if subscription.get("isDefault"):
+            return subscription.get("id")
+    return None
+
+
+def _default_from_cli():
+    try:
+        result = subprocess.run(
+            ["az", "account", "show", "--query", "id", "-o", "tsv"],
+            capture_output=True, text=True, check=True, shell=False,
+        )
+    except FileNotFoundError:
+        raise RuntimeError("Azure CLI ('az') command not found. Please install it or set the AZURE_SUBSCRIPTION_ID environment variable.")
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Azure CLI command failed: {e.stderr.strip()}. Hint: Are you logged in to Azure CLI ('az login')?")
+    subscription_id = result.stdout.strip()
+    if not subscription_id:
+        raise RuntimeError("Azure CLI did not return a subscription ID. Is it configured with a default subscription?")
+    return subscription_id
+
+
+def get_subscription_id():
+    """AZURE_SUBSCRIPTION_ID, else the Azure CLI default subscription.
+
+    The default is read from azureProfile.json, so `az account set` takes
+    effect immediately. Only when that file is missing is `az account show`
+    run, and its answer cached for AZURE_CONTEXT_TTL seconds (12 hours by default).
+    """
+    subscription_id = os.getenv("AZURE_SUBSCRIPTION_ID")
+    if subscription_id:
+        return subscription_id
+    subscription_id = _default_from_profile()
+    if subscription_id:
+        return subscription_id
+    subscription_id = _read_cache()
+    if subscription_id:
+        return subscription_id
+    subscription_id = _default_from_cli()
+    logger.info("Using the Azure CLI default subscription: %s", subscription_id)
+    _write_cache(subscription_id)
+    return subscription_id
+
+
+def get_client(client_class, subscription_id=None):
+    """Shared management client, e.g. get_client(ResourceManagementClient)."""
+    subscription_id = subscription_id or get_subscription_id()
+    credential = get_credential()
+    key = (client_class, subscription_id)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = client_class(credential, subscription_id)
+            _clients[key] = client
+        return client
+
+
+def clear_cache():
+    """Forget the subscription cached from `az account show`."""
+    try:
+        os.remove(_cache_path())
+    except OSError:
+        pass
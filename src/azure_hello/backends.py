@@ -0,0 +1,77 @@
+import itertools
+import os
+
+DEFAULT_SQLITE_PATH = "local.sqlite3"
+# Numbers the in-memory databases; id() can be reused while an old database is still open.
+_memory_databases = itertools.count(1)
+
+
+def backend_name():
+    return os.environ.get("DB_BACKEND", "azuresql").lower()
+
+
+class AzureSQLBackend:
+    driver = "{ODBC Driver 18 for SQL Server}"
+
+    def __init__(self, server_name, database_name, admin_user, password):
+        import pyodbc
+        self._pyodbc = pyodbc
+        self.errors = (pyodbc.Error,)
+        self.server_name = server_name
+        self.database_name = database_name
+        self.admin_user = admin_user
+        # A callable is asked for the password on every new connection, so a rotated secret is picked up.
+        self._password = password if callable(password) else lambda: password
+
+    @property
+    def conn_str(self):
+        return (
+            f"DRIVER={self.driver};"
+            f"SERVER=tcp:{self.server_name}.database.windows.net,1433;"
+            f"DATABASE={self.database_name};"
+            f"UID={self.admin_user};"
+            f"PWD={self._password()};"
+            f"Encrypt=yes;"
+            f"TrustServerCertificate=no;"
+            f"Connection Timeout=30;"
+        )
+
+    @property
+    def key(self):
+        # Stable across password rotations: pools and circuit breakers are keyed on it.
+        return f"mssql://{self.admin_user}@{self.server_name}/{self.database_name}"
+
+    def describe(self):
+        return f"database '{self.database_name}' on server '{self.server_name}.database.windows.net'"
+
+    def connect(self):
+        return self._pyodbc.connect(self.conn_str, autocommit=True)
+
+
+class SQLiteBackend:
+    """In-process stand-in for Azure SQL; see sqlite_adapter for the T-SQL it understands."""
+
+    def __init__(self, path=None):
+        import sqlite3
+        self.errors = (sqlite3.Error,)
+        self.path = path or os.environ.get("SQLITE_PATH", DEFAULT_SQLITE_PATH)
+        # A plain ":memory:" database is private to one connection; use a named
+        # shared-cache one so every pooled connection sees the same data.
+        self._uri = self.path == ":memory:"
+        self._database = f"file:azure_hello_{next(_memory_databases)}?mode=memory&cache=shared" if self._uri else self.path
+        self._keepalive = self.connect() if self._uri else None
+
+    @property
+    def key(self):
+        return f"sqlite:{self._database}"
+
+    def describe(self):
+        return f"SQLite database '{self.path}'"
+
+    def connect(self):
+        from .sqlite_adapter import SQLiteConnection
+        return SQLiteConnection(self._database, uri=self._uri)
+
+
+def sqlite_backend_enabled():
+    return backend_name() == "sqlite"
@@ -1,86 +1,535 @@
+import logging
 import os
-import pyodbc
-from azure.identity import DefaultAzureCredential
-from azure.keyvault.secrets import SecretClient
-import pandas as pd
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+
+from .backends import AzureSQLBackend, SQLiteBackend, sqlite_backend_enabled
+from .instrumentation import span, span_fingerprint
+from .pool import get_pool
+from .result_cache import ResultCache, get_result_cache, is_ddl, is_read_only, normalize_sql, referenced_tables
+from .retry import RetryPolicy, get_circuit_breaker, is_connection_error, is_login_failure, is_transient
+from .secret_cache import get_secret_cache, secret_backend_name
+from .sql_script import clean_message, split_batches
+from .statements import DEFAULT_STATEMENT_CACHE_SIZE, StatementCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+DEFAULT_BATCH_SIZE = 1000
+
+
+def quote_identifier(name):
+    """Bracket-quote a possibly schema-qualified T-SQL identifier, e.g. dbo.users -> [dbo].[users]."""
+    return ".".join("[" + part.replace("]", "]]") + "]" for part in name.split("."))
+
+
+@dataclass
+class BulkInsertResult:
+    inserted: int = 0
+    failed_rows: int = 0
+    failed_batches: list = field(default_factory=list)
+
+
+@dataclass
+class ScriptOutput:
+    results: list = field(default_factory=list)
+    messages: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return sum(len(frame) for frame in self.results)
+
+
+def _fetch_batches(cursor, chunk_size):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def _chunked(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rows_to_frame(description, rows, sql_fingerprint=None):
+    # pandas (and pyarrow in execute_arrow) are imported on first use; they dominate import time.
+    import pandas as pd
+    with span("build", sql_fingerprint=sql_fingerprint) as record:
+        frame = pd.DataFrame([list(row) for row in rows], columns=[column[0] for column in description])
+        record.rows = len(frame)
+        record.bytes = int(frame.memory_usage(index=False).sum())
+    return frame
+
+
+def fetch_frame(cursor, sql_fingerprint=None):
+    with span("fetch", sql_fingerprint=sql_fingerprint) as record:
+        rows = cursor.fetchall()
+        record.rows = len(rows)
+    return rows_to_frame(cursor.description, rows, sql_fingerprint)
+
+
+def collect_results(cursor, output, sql_fingerprint=None):
+    while True:
+        # pyodbc exposes (state, text) pairs for PRINT/info messages of the current result.
+        output.messages.extend(clean_message(message) for _state, message in getattr(cursor, "messages", None) or [])
+        if cursor.description:
+            output.results.append(fetch_frame(cursor, sql_fingerprint))
+        if not cursor.nextset():
+            break
+
 
 class DBClient:
-    def __init__(self):
-        self.server_name = os.environ.get("SQL_SERVER_NAME")
-        self.database_name = os.environ.get("SQL_DB_NAME")
-        self.admin_user = os.environ.get("SQL_ADMIN")
-        self.keyvault_name = os.environ.get("KEYVAULT_NAME")
-        self.password_secret_name = f"{self.server_name}-password"
-
-        if not all([self.server_name, self.database_name, self.admin_user, self.keyvault_name]):
-            raise ValueError("Required environment variables (SQL_SERVER_NAME, SQL_DB_NAME, SQL_ADMIN, KEYVAULT_NAME) are not set. Please source env.sh first.")
-
-        self.keyvault_uri = f"https://{self.keyvault_name}.vault.azure.net"
-        self.driver = "{ODBC Driver 18 for SQL Server}"
-        self.sql_password = self._fetch_password()
-        self.conn_str = (
-            f"DRIVER={self.driver};"
-            f"SERVER=tcp:{self.server_name}.database.windows.net,1433;"
-            f"DATABASE={self.database_name};"
-            f"UID={self.admin_user};"
-            f"PWD={self.sql_password};"
-            f"Encrypt=yes;"
-            f"TrustServerCertificate=no;"
-            f"Connection Timeout=30;"
-        )
+    def __init__(self, pooled=False, pool_min_size=1, pool_max_size=5, pool_idle_timeout=300,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE, result_cache=None, retry_policy=None):
+        if sqlite_backend_enabled():
+            # DB_BACKEND=sqlite: local stand-in, no Azure SQL server or Key Vault needed.
+            self.backend = SQLiteBackend()
+            self.server_name = "localhost"
+            self.database_name = self.backend.path
+        else:
+            self.server_name = os.environ.get("SQL_SERVER_NAME")
+            self.database_name = os.environ.get("SQL_DB_NAME")
+            self.admin_user = os.environ.get("SQL_ADMIN")
+            self.keyvault_name = os.environ.get("KEYVAULT_NAME")
+            self.password_secret_name = f"{self.server_name}-password"
+
+            required = [self.server_name, self.database_name, self.admin_user]
+            if secret_backend_name() == "keyvault":
+                required.append(self.keyvault_name)
+            if not all(required):
+                raise ValueError("Required environment variables (SQL_SERVER_NAME, SQL_DB_NAME, SQL_ADMIN, KEYVAULT_NAME) are not set. Please source env.sh first.")
+
+            self.keyvault_uri = f"https://{self.keyvault_name}.vault.azure.net" if self.keyvault_name else None
+            # Fetched now so a missing secret fails here; every new connection then reads the current value.
+            self._fetch_password()
+            self.backend = AzureSQLBackend(self.server_name, self.database_name, self.admin_user, self._fetch_password)
+        self.errors = self.backend.errors
         self.connection = None
+        self.statement_cache_size = statement_cache_size
+        self._statements = None
+        # Opt-in: True shares the process-wide cache, or pass a ResultCache.
+        self.result_cache = get_result_cache() if result_cache is True else (result_cache or None)
+        self.retry_policy = retry_policy or RetryPolicy.from_env()
+        self.circuit_breaker = get_circuit_breaker(self.backend.key)
+        self.pool = None
+        if pooled:
+            # Pools are shared process-wide per connection string, so every client
+            # (and every Streamlit session) reuses the same warm connections.
+            self.pool = get_pool(
+                self.backend.key,
+                self._open_connection,
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                idle_timeout=pool_idle_timeout,
+            )
 
     def _fetch_password(self):
-        print(f"Fetching password secret '{self.password_secret_name}' from Key Vault '{self.keyvault_name}'...")
+        # Served from the process-wide cache after the first fetch, so creating
+        # further clients does not touch the network.
+        cache = get_secret_cache(self.keyvault_uri)
         try:
-            credential = DefaultAzureCredential()
-            secret_client = SecretClient(vault_url=self.keyvault_uri, credential=credential)
-            sql_password = secret_client.get_secret(self.password_secret_name).value
-            print("Successfully fetched SQL password from Key Vault.")
-            return sql_password
+            with span("secret"):
+                return cache.get(self.password_secret_name)
         except Exception as e:
-            raise RuntimeError(f"Error fetching secret from Key Vault: {e}. Ensure you are logged into Azure (az login) and have permissions.")
+            raise RuntimeError(f"Error fetching secret '{self.password_secret_name}' from {cache.backend.describe()}: {e}. Ensure you are logged into Azure (az login) and have permissions.")
+
+    def _open_connection(self):
+        logger.info("Connecting to %s...", self.backend.describe())
+        try:
+            connection = self._call(self._connect_once, "connecting to database")
+        except RuntimeError:
+            raise
+        except Exception as e:
+            raise RuntimeError(f"An unexpected error occurred while connecting: {e}")
+        logger.info("Connection successful.")
+        return connection
+
+    def _connect_once(self):
+        with span("connect"):
+            try:
+                return self.backend.connect()
+            except self.errors as ex:
+                if isinstance(self.backend, SQLiteBackend) or not is_login_failure(ex):
+                    raise
+                # The password may have been rotated since it was cached; fetch it once more.
+                logger.warning("Login failed; fetching secret '%s' again and retrying.", self.password_secret_name)
+                get_secret_cache(self.keyvault_uri).invalidate(self.password_secret_name)
+                return self.backend.connect()
+
+    def _call(self, run, action, idempotent=True):
+        """Run `run()`, retrying transient database errors with jittered backoff.
+
+        Work that is not idempotent is attempted once. Every attempt goes
+        through the database's circuit breaker, which fails fast while the
+        server keeps answering with transient (e.g. throttling) errors.
+        """
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            try:
+                result = run()
+            except self.errors as ex:
+                if not is_transient(ex):
+                    self.circuit_breaker.record_success()
+                    raise RuntimeError(f"Error {action}: {ex.args[0]}. {ex}") from ex
+                self.circuit_breaker.record_failure()
+                self._reset_after(ex)
+                attempt += 1
+                if not idempotent or attempt >= self.retry_policy.attempts:
+                    raise RuntimeError(f"Error {action} (transient, {attempt} attempt(s)): {ex.args[0]}. {ex}") from ex
+                delay = self.retry_policy.delay(attempt - 1, ex)
+                logger.warning("Transient error %s: %s. Retrying in %.1fs (attempt %d of %d)...",
+                               action, ex, delay, attempt + 1, self.retry_policy.attempts)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Pool timeouts, bugs and interrupts say nothing about the server, but must not keep the trial slot.
+                self.circuit_breaker.release_trial()
+                raise
+            self.circuit_breaker.record_success()
+            return result
+
+    def _reset_after(self, error):
+        # The failed pooled connection is already dropped by its checkout (it fails the ping);
+        # after a failover the idle ones are dead too.
+        if not is_connection_error(error):
+            return
+        if self.pool is not None:
+            self.pool.discard_idle()
+        elif self.connection is not None:
+            self._statements = None
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
 
     def connect(self):
+        if self.pool is not None:
+            self.pool.fill()
+            return self.pool
         if self.connection is None:
-            print(f"Connecting to database '{self.database_name}' on server '{self.server_name}.database.windows.net'...")
-            try:
-                self.connection = pyodbc.connect(self.conn_str, autocommit=True)
-                print("Connection successful.")
-            except pyodbc.Error as ex:
-                sqlstate = ex.args[0]
-                raise RuntimeError(f"Error connecting to database: {sqlstate}. {ex}")
-            except Exception as e:
-                raise RuntimeError(f"An unexpected error occurred while connecting: {e}")
+            self.connection = self._open_connection()
         return self.connection
 
-    def execute_sql(self, sql_script):
-        if not self.connection:
-            self.connect()
-        try:
-            with self.connection.cursor() as cursor:
-                print("Executing SQL script...")
-                cursor.execute(sql_script)
-                # Check if the query returns results
-                if cursor.description:
-                    columns = [column[0] for column in cursor.description]
-                    results = cursor.fetchall()
-                    # Ensure results are in a list of lists format for DataFrame
-                    formatted_results = [list(row) for row in results]
-                    df = pd.DataFrame(formatted_results, columns=columns)
-                    print("SQL script executed with results.")
-                    return df
-                else:
-                    print("SQL script executed.")
+    @contextmanager
+    def _checkout(self):
+        if self.pool is not None:
+            with self.pool.connection() as connection:
+                yield connection
+        else:
+            yield self.connect()
+
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor whose statements commit together, or roll back if the block raises."""
+        with self._checkout() as connection:
+            connection.autocommit = False
+            try:
+                cursor = connection.cursor()
+                try:
+                    yield cursor
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            finally:
+                connection.autocommit = True
+
+    @contextmanager
+    def _checkout_statements(self):
+        if self.pool is not None:
+            with self.pool.checkout() as entry:
+                if entry.statements is None:
+                    entry.statements = StatementCache(entry.connection, self.statement_cache_size)
+                yield entry.statements
+        else:
+            connection = self.connect()
+            if self._statements is None or self._statements.connection is not connection:
+                self._statements = StatementCache(connection, self.statement_cache_size)
+            yield self._statements
+
+    def execute(self, sql, params=None, use_cache=True):
+        """Run a single statement with `?` placeholders bound to `params`.
+
+        Cursors are cached per connection by SQL text, so repeated calls with
+        the same statement reuse its prepared handle and plan. Pass
+        use_cache=False to bypass the result cache for reads that must be fresh.
+        """
+        params = () if params is None else tuple(params)
+        if not use_cache:
+            return self._execute_statement(sql, params)
+        return self._through_cache(sql, params, lambda: self._execute_statement(sql, params))
+
+    def _execute_statement(self, sql, params):
+        # Reads are retried on transient errors; a write might already have been applied.
+        return self._call(lambda: self._execute_statement_once(sql, params), "executing SQL statement",
+                          idempotent=is_read_only(normalize_sql(sql)))
+
+    def _execute_statement_once(self, sql, params):
+        with self._checkout_statements() as statements:
+            cursor = statements.cursor(sql)
+            sql_fingerprint = span_fingerprint(sql)
+            try:
+                with span("execute", sql_fingerprint=sql_fingerprint):
+                    cursor.execute(sql, params)
+                if not cursor.description:
                     return None
-        except pyodbc.Error as ex:
-            sqlstate = ex.args[0]
-            raise RuntimeError(f"Error executing SQL script: {sqlstate}. {ex}")
+                return fetch_frame(cursor, sql_fingerprint)
+            except BaseException:
+                # Never hand a cursor with a half-read result back to the cache.
+                statements.discard(sql)
+                raise
+
+    def execute_script(self, sql_script):
+        """Run every GO-separated batch of a script on one connection.
+
+        Walks all result sets of each batch with cursor.nextset() and collects
+        PRINT/informational messages, which arrive in the same TDS stream as
+        the results and cost no extra round trips.
+        """
+        output = self._run_script(sql_script)
+        self._invalidate_after_write(normalize_sql(sql_script))
+        return output
+
+    def _run_script(self, sql_script):
+        batches = split_batches(sql_script)
+        try:
+            output = self._call(lambda: self._run_script_once(batches), "executing SQL script",
+                                idempotent=is_read_only(normalize_sql(sql_script)))
+        except RuntimeError:
+            raise
         except Exception as e:
             raise RuntimeError(f"An unexpected error occurred while executing SQL: {e}")
+        for message in output.messages:
+            logger.info("%s", message)
+        return output
+
+    def _run_script_once(self, batches):
+        output = ScriptOutput()
+        with self._checkout() as connection, connection.cursor() as cursor:
+            logger.info("Executing SQL script (%d batch(es))...", len(batches))
+            for batch, repeat in batches:
+                sql_fingerprint = span_fingerprint(batch)
+                for _ in range(repeat):
+                    with span("execute", sql_fingerprint=sql_fingerprint):
+                        cursor.execute(batch)
+                    collect_results(cursor, output, sql_fingerprint)
+        return output
+
+    def execute_sql(self, sql_script, columnar=False):
+        """Run a script and return its first result set as a DataFrame (None if it has none).
+
+        Use execute_script() to get every result set and the PRINT messages.
+        """
+        return self._through_cache(
+            sql_script, (), lambda: self._first_result(sql_script, columnar), variant="columnar " if columnar else "",
+        )
+
+    def _first_result(self, sql_script, columnar):
+        if columnar:
+            from .columnar import table_to_dataframe
+            table = self.execute_arrow(sql_script)
+            return None if table is None else table_to_dataframe(table)
+        output = self._run_script(sql_script)
+        if output.results:
+            logger.info("SQL script executed with results.")
+            return output.results[0]
+        logger.info("SQL script executed.")
+        return None
+
+    def _through_cache(self, sql, params, run, variant=""):
+        if self.result_cache is None:
+            return run()
+        normalized = normalize_sql(sql)
+        if not is_read_only(normalized):
+            result = run()
+            self._invalidate_after_write(normalized)
+            return result
+        key = ResultCache.key(variant + normalized, params)
+        frame = self.result_cache.get(key)
+        if frame is not None:
+            logger.debug("Returning cached query result.")
+            return frame
+        frame = run()
+        if frame is not None:
+            self.result_cache.put(key, frame, referenced_tables(normalized))
+        return frame
+
+    def _invalidate_after_write(self, normalized_sql):
+        if self.result_cache is None or is_read_only(normalized_sql):
+            return
+        if is_ddl(normalized_sql):
+            self.result_cache.clear()
+        else:
+            self.result_cache.invalidate_tables(referenced_tables(normalized_sql))
+
+    def iter_rows(self, sql_script, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield result rows one at a time, fetching `chunk_size` rows per round trip."""
+        for _description, rows in self._iter_batches(sql_script, chunk_size, span_fingerprint(sql_script)):
+            yield from rows
+
+    def iter_chunks(self, sql_script, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Yield the result as DataFrames of at most `chunk_size` rows.
+
+        Only one chunk is held in memory at a time, and the first chunk is
+        available as soon as the server has sent it.
+        """
+        sql_fingerprint = span_fingerprint(sql_script)
+        for description, rows in self._iter_batches(sql_script, chunk_size, sql_fingerprint):
+            yield rows_to_frame(description, rows, sql_fingerprint)
+
+    def execute_arrow(self, sql_script, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Run every GO-separated batch of a script and return its first result set as a pyarrow Table.
+
+        Column types are taken from cursor.description. Returns None if the
+        script produces no result set, like execute_sql().
+        """
+        return self._call(lambda: self._execute_arrow_once(sql_script, chunk_size), "executing SQL script",
+                          idempotent=is_read_only(normalize_sql(sql_script)))
+
+    def _execute_arrow_once(self, sql_script, chunk_size):
+        # Same batches and statements as execute_script(); only the first result set is converted.
+        from .columnar import batches_to_table
+        batches = split_batches(sql_script)
+        table = None
+        with self._checkout() as connection, connection.cursor() as cursor:
+            logger.info("Executing SQL script (%d batch(es))...", len(batches))
+            cursor.arraysize = chunk_size
+            for batch, repeat in batches:
+                sql_fingerprint = span_fingerprint(batch)
+                for _ in range(repeat):
+                    with span("execute", sql_fingerprint=sql_fingerprint):
+                        cursor.execute(batch)
+                    while True:
+                        if cursor.description and table is None:
+                            # Fetching and Arrow conversion are interleaved batch by batch, so report them as one phase.
+                            with span("fetch", sql_fingerprint=sql_fingerprint) as record:
+                                table = batches_to_table(cursor.description, _fetch_batches(cursor, chunk_size))
+                                record.rows = table.num_rows
+                                record.bytes = table.nbytes
+                        if not cursor.nextset():
+                            break
+        logger.info("SQL script executed with results." if table is not None else "SQL script executed.")
+        return table
+
+    def bulk_insert(self, table, rows, columns=None, batch_size=DEFAULT_BATCH_SIZE, on_progress=None, on_error=None):
+        """Insert `rows` (a DataFrame or an iterable of sequences) with fast_executemany.
+
+        Each batch of `batch_size` rows is sent as one parameter array and
+        committed on its own. A failing batch is rolled back and handed to
+        `on_error(batch, error)` (or collected in the result) instead of
+        aborting the load; `on_progress(inserted, failed_rows)` runs after
+        every batch.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be positive, got {batch_size}")
+        pd = sys.modules.get("pandas")
+        if pd is not None and isinstance(rows, pd.DataFrame):
+            columns = list(rows.columns) if columns is None else columns
+            # Box NumPy scalars to Python objects and NaN/NaT to None so pyodbc can bind them.
+            frame = rows[columns].astype(object)
+            rows = frame.where(frame.notna(), None).itertuples(index=False, name=None)
+        if not columns:
+            raise ValueError("bulk_insert needs column names when rows is not a DataFrame.")
+
+        insert_sql = (
+            f"INSERT INTO {quote_identifier(table)} "
+            f"({', '.join(quote_identifier(column) for column in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        sql_fingerprint = span_fingerprint(insert_sql)
+        result = BulkInsertResult()
+        logger.info("Bulk inserting into %s in batches of %d...", table, batch_size)
+        with self._checkout() as connection:
+            connection.autocommit = False
+            try:
+                cursor = connection.cursor()
+                cursor.fast_executemany = True
+                try:
+                    for batch in _chunked(rows, batch_size):
+                        try:
+                            with span("bulk_insert", sql_fingerprint=sql_fingerprint) as record:
+                                record.rows = len(batch)
+                                cursor.executemany(insert_sql, batch)
+                                connection.commit()
+                            result.inserted += len(batch)
+                        except self.errors as ex:
+                            connection.rollback()
+                            result.failed_rows += len(batch)
+                            if on_error is not None:
+                                on_error(batch, ex)
+                            else:
+                                result.failed_batches.append((batch, ex))
+                        if on_progress is not None:
+                            on_progress(result.inserted, result.failed_rows)
+                finally:
+                    cursor.close()
+            finally:
+                connection.autocommit = True
+        if self.result_cache is not None and result.inserted:
+            self.result_cache.invalidate_tables([table.split(".")[-1].strip("[]")])
+        logger.info("Bulk insert finished: %d rows inserted, %d rows failed.", result.inserted, result.failed_rows)
+        return result
+
+    def _iter_batches(self, sql_script, chunk_size, sql_fingerprint=None):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        # Only the execute and first fetch are retried: once rows have been yielded a retry would repeat them.
+        stack, cursor, rows = self._call(lambda: self._open_stream(sql_script, chunk_size, sql_fingerprint), "executing SQL script",
+                                         idempotent=is_read_only(normalize_sql(sql_script)))
+        with stack:
+            if rows is None:
+                logger.info("SQL script executed.")
+                return
+            try:
+                while rows:
+                    yield cursor.description, rows
+                    with span("fetch", sql_fingerprint=sql_fingerprint) as record:
+                        rows = cursor.fetchmany(chunk_size)
+                        record.rows = len(rows)
+            except self.errors as ex:
+                raise RuntimeError(f"Error executing SQL script: {ex.args[0]}. {ex}") from ex
+            logger.info("SQL script streamed.")
+
+    def _open_stream(self, sql_script, chunk_size, sql_fingerprint):
+        stack = ExitStack()
+        try:
+            connection = stack.enter_context(self._checkout())
+            cursor = stack.enter_context(connection.cursor())
+            logger.info("Streaming SQL script...")
+            cursor.arraysize = chunk_size
+            with span("execute", sql_fingerprint=sql_fingerprint):
+                cursor.execute(sql_script)
+            if not cursor.description:
+                return stack, cursor, None
+            with span("fetch", sql_fingerprint=sql_fingerprint) as record:
+                rows = cursor.fetchmany(chunk_size)
+                record.rows = len(rows)
+            return stack, cursor, rows
+        except BaseException:
+            # Unwind with the exception so a pooled connection is checked before reuse.
+            if not stack.__exit__(*sys.exc_info()):
+                raise
 
     def close(self):
+        # Pooled connections outlive the client; use pool.close_all_pools() at shutdown.
+        if self._statements is not None:
+            self._statements.clear()
+            self._statements = None
         if self.connection:
             self.connection.close()
             self.connection = None
-            print("Database connection closed.")
+            logger.info("Database connection closed.")
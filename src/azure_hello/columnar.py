@@ -0,0 +1,64 @@
+import datetime
+import decimal
+
+import pandas as pd
+import pyarrow as pa
+
+# pyodbc reports the Python type each column converts to as `type_code` in
+# cursor.description; INT and BIGINT are told apart by their precision.
+_INT32_MAX_PRECISION = 10
+
+
+def arrow_type(column_description):
+    name, type_code, _display_size, _internal_size, precision, scale, _null_ok = column_description
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int32() if precision and precision <= _INT32_MAX_PRECISION else pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is str:
+        return pa.string()
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code is decimal.Decimal and precision and precision <= 38:
+        return pa.decimal128(precision, scale or 0)
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return None
+
+
+def record_batch(description, rows):
+    """Convert one fetchmany() batch of pyodbc rows into a typed Arrow RecordBatch."""
+    columns = list(zip(*rows)) if rows else [() for _ in description]
+    arrays = []
+    for column, values in zip(description, columns):
+        pa_type = arrow_type(column)
+        # Unknown driver types fall back to Arrow's own inference.
+        arrays.append(pa.array(values, type=pa_type) if pa_type is not None else pa.array(values))
+    return pa.RecordBatch.from_arrays(arrays, names=[column[0] for column in description])
+
+
+def batches_to_table(description, batches):
+    record_batches = [record_batch(description, rows) for rows in batches]
+    if not record_batches:
+        record_batches = [record_batch(description, [])]
+    # Columns of unknown type may infer differently per batch; unify before concatenating.
+    schema = pa.unify_schemas([batch.schema for batch in record_batches], promote_options="permissive")
+    return pa.Table.from_batches([batch.cast(schema) for batch in record_batches], schema=schema)
+
+
+def _pandas_type(pa_type):
+    if pa.types.is_string(pa_type):
+        return pd.ArrowDtype(pa.string())
+    return None
+
+
+def table_to_dataframe(table):
+    # Numeric and temporal columns land in NumPy dtypes (int32/int64/datetime64);
+    # strings stay Arrow-backed instead of becoming Python object columns.
+    return table.to_pandas(types_mapper=_pandas_type)
@@ -0,0 +1,180 @@
+import datetime
+import glob
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+
+from .client import DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = "_watermark.json"
+PARTITION_COLUMN = "created_date"
+# Hive's name for the partition of rows whose partition key is NULL.
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# IDENTITY values are handed out before commit, so a transaction holding a lower id
+# can commit after a higher one was exported. Every run re-reads this many ids below
+# the watermark and picks up the ids that were still missing there.
+DEFAULT_OVERLAP_IDS = 1000
+
+# id is an IDENTITY column, so every inserted row gets a larger id than the last
+# export saw, even when created_at was set explicitly. The bound is inlined like
+# users.py's TOP: it is a validated int, and iter_chunks takes no parameters.
+USERS_SQL = "SELECT id, username, email, created_at FROM dbo.users WHERE id > {low_id} ORDER BY id"
+
+
+@dataclass
+class ExportResult:
+    rows: int = 0
+    recovered: int = 0
+    last_id: int = 0
+    last_created_at: str = None
+    files: list = field(default_factory=list)
+
+
+def _users_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.int32()),
+        ("username", pa.string()),
+        ("email", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+
+def read_watermark(output_dir):
+    """The high-water mark of the last successful export, or None before the first one."""
+    try:
+        with open(os.path.join(output_dir, WATERMARK_FILE), "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_watermark(output_dir, watermark):
+    path = os.path.join(output_dir, WATERMARK_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump(watermark, file, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _partition(created_at):
+    if created_at is None:
+        return NULL_PARTITION
+    return created_at.strftime("%Y-%m-%d")
+
+
+def _remove_stale_parts(output_dir):
+    # Left behind by an export that failed before committing its watermark.
+    for path in glob.glob(os.path.join(output_dir, f"{PARTITION_COLUMN}=*", "*.parquet.tmp")):
+        logger.info("Removing unfinished export file %s", path)
+        os.remove(path)
+
+
+def _in_ranges(ids, ranges):
+    mask = ids < 0
+    for low, high in ranges:
+        mask |= (ids >= low) & (ids <= high)
+    return mask
+
+
+def _without(ranges, ids):
+    """`ranges` ([low, high] inclusive) minus the sorted `ids`."""
+    remaining = []
+    for low, high in ranges:
+        for found in (i for i in ids if low <= i <= high):
+            if found > low:
+                remaining.append([low, found - 1])
+            low = found + 1
+        if low <= high:
+            remaining.append([low, high])
+    return remaining
+
+
+def _above(ranges, floor):
+    return [[max(low, floor + 1), high] for low, high in ranges if high > floor]
+
+
+def export_users(client, output_dir, chunk_size=DEFAULT_CHUNK_SIZE, overlap=DEFAULT_OVERLAP_IDS):
+    """Append users added since the last export to output_dir as Parquet partitioned by creation date.
+
+    Rows are streamed with client.iter_chunks, so memory is bounded by
+    chunk_size whatever the size of the table. Ids skipped within `overlap`
+    of the watermark are remembered and exported if they show up later. Each
+    run writes one file per partition it touches
+    (created_date=YYYY-MM-DD/part-<run>.parquet). The files are renamed into
+    place and the watermark advanced only after every chunk has been
+    written, so a failed run is simply repeated.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _users_schema()
+    os.makedirs(output_dir, exist_ok=True)
+    _remove_stale_parts(output_dir)
+    watermark = read_watermark(output_dir) or {}
+    last_id = int(watermark.get("last_id", 0))
+    missing = _above(watermark.get("missing_ids", []), last_id - overlap)
+    low_id = min([last_id] + [low - 1 for low, _high in missing])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    run_id = now.strftime("%Y%m%dT%H%M%S%fZ")
+    result = ExportResult(last_id=last_id, last_created_at=watermark.get("last_created_at"))
+
+    logger.info("Exporting users with id > %d (and %d missing id ranges below) to %s...", last_id, len(missing), output_dir)
+    writers = {}
+    recovered = []
+    gaps = []
+    try:
+        for frame in client.iter_chunks(USERS_SQL.format(low_id=int(low_id)), chunk_size=chunk_size):
+            ids = frame["id"].to_numpy()
+            late = _in_ranges(ids, missing) & (ids <= last_id)
+            recovered.extend(int(i) for i in ids[late])
+            frame = frame[late | (ids > last_id)]
+            if frame.empty:
+                continue
+            # Ids skipped above the watermark may belong to transactions that have not committed yet.
+            for user_id in frame["id"][frame["id"] > last_id]:
+                if user_id > result.last_id + 1:
+                    gaps.append([result.last_id + 1, int(user_id) - 1])
+                result.last_id = int(user_id)
+            gaps = _above(gaps, result.last_id - overlap)
+
+            table = pa.Table.from_pandas(frame[schema.names], schema=schema, preserve_index=False)
+            partitions = [_partition(value) for value in table.column("created_at").to_pylist()]
+            for partition in sorted(set(partitions)):
+                if partition not in writers:
+                    directory = os.path.join(output_dir, f"{PARTITION_COLUMN}={partition}")
+                    os.makedirs(directory, exist_ok=True)
+                    path = os.path.join(directory, f"part-{run_id}.parquet")
+                    writers[partition] = (path, pq.ParquetWriter(path + ".tmp", schema))
+                mask = pa.array([value == partition for value in partitions])
+                writers[partition][1].write_table(table.filter(mask))
+            result.rows += table.num_rows
+            latest = max((value for value in table.column("created_at").to_pylist() if value is not None), default=None)
+            if latest is not None:
+                latest = latest.isoformat()
+                result.last_created_at = max(filter(None, [result.last_created_at, latest]))
+            logger.info("Exported %d rows (up to id %d).", result.rows, result.last_id)
+    except BaseException:
+        for path, writer in writers.values():
+            writer.close()
+            os.remove(path + ".tmp")
+        raise
+
+    for path, writer in writers.values():
+        writer.close()
+        os.replace(path + ".tmp", path)
+        result.files.append(path)
+    result.recovered = len(recovered)
+    if result.rows:
+        _write_watermark(output_dir, {
+            "last_id": result.last_id,
+            "missing_ids": _above(_without(missing, sorted(recovered)) + gaps, result.last_id - overlap),
+            "last_created_at": result.last_created_at,
+            "exported_at": now.isoformat(timespec="seconds"),
+            "rows": result.rows,
+        })
+    logger.info("Export finished: %d new rows (%d that committed late) in %d files.",
+                result.rows, result.recovered, len(result.files))
+    return result
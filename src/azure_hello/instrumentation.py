@@ -0,0 +1,130 @@
+import hashlib
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from .result_cache import normalize_sql
+
+# Phases reported by DBClient: secret, connect, execute, fetch, build, bulk_insert.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_LITERAL = re.compile(r"N?'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_hooks = []
+_hooks_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("phase", "sql_fingerprint", "start", "duration", "rows", "bytes", "error")
+
+    def __init__(self, phase, sql_fingerprint=None):
+        self.phase = phase
+        self.sql_fingerprint = sql_fingerprint
+        self.start = time.perf_counter()
+        self.duration = None
+        self.rows = None
+        self.bytes = None
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name != "start"}
+
+
+def fingerprint(sql):
+    """Stable id for a statement shape: literals become ?, then hash the normalized text."""
+    shape = _LITERAL.sub("?", normalize_sql(sql))
+    return hashlib.sha1(shape.encode("utf-8")).hexdigest()[:12]
+
+
+def add_hook(hook):
+    """Register `hook(span)`, called after every instrumented phase finishes."""
+    with _hooks_lock:
+        _hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+def clear_hooks():
+    with _hooks_lock:
+        _hooks.clear()
+
+
+def span_fingerprint(sql):
+    """fingerprint(sql) if a hook is registered to see it, else None.
+
+    Compute it once per statement and pass it to each of its spans as
+    sql_fingerprint, rather than re-hashing the SQL for every chunk.
+    """
+    return fingerprint(sql) if sql is not None and _hooks else None
+
+
+@contextmanager
+def span(phase, sql=None, sql_fingerprint=None):
+    # With no hooks registered this only costs a perf_counter() call.
+    record = Span(phase, sql_fingerprint if sql_fingerprint is not None else span_fingerprint(sql))
+    try:
+        yield record
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.duration = time.perf_counter() - record.start
+        for hook in list(_hooks):
+            try:
+                hook(record)
+            except Exception:
+                pass
+
+
+class HistogramExporter:
+    """Prometheus-style per-phase duration histograms, row and byte counters.
+
+    Register with add_hook(exporter) and serve exporter.render() as text/plain
+    from whatever /metrics endpoint the app exposes.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="azure_hello_db"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._phases = {}
+
+    def __call__(self, record):
+        with self._lock:
+            stats = self._phases.get(record.phase)
+            if stats is None:
+                stats = self._phases[record.phase] = {
+                    "buckets": [0] * len(self.buckets), "count": 0, "sum": 0.0, "rows": 0, "bytes": 0, "errors": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if record.duration <= bound:
+                    stats["buckets"][i] += 1
+            stats["count"] += 1
+            stats["sum"] += record.duration
+            stats["rows"] += record.rows or 0
+            stats["bytes"] += record.bytes or 0
+            stats["errors"] += record.error is not None
+
+    def render(self):
+        lines = [
+            f"# TYPE {self.prefix}_phase_seconds histogram",
+        ]
+        with self._lock:
+            phases = {phase: dict(stats, buckets=list(stats["buckets"])) for phase, stats in self._phases.items()}
+        for phase, stats in sorted(phases.items()):
+            for bound, count in zip(self.buckets, stats["buckets"]):
+                lines.append(f'{self.prefix}_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {count}')
+            lines.append(f'{self.prefix}_phase_seconds_bucket{{phase="{phase}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'{self.prefix}_phase_seconds_sum{{phase="{phase}"}} {stats["sum"]}')
+            lines.append(f'{self.prefix}_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+        for name in ("rows", "bytes", "errors"):
+            lines.append(f"# TYPE {self.prefix}_{name}_total counter")
+            for phase, stats in sorted(phases.items()):
+                lines.append(f'{self.prefix}_{name}_total{{phase="{phase}"}} {stats[name]}')
+        return "\n".join(lines) + "\n"
@@ -1,7 +1,63 @@
+import os
+
 import streamlit as st
 
+from .client import DBClient
+from .users import DEFAULT_PAGE_SIZE, users_page
+
+USERS_CACHE_TTL = int(os.environ.get("UI_CACHE_TTL", 60))
+ORDER_LABELS = {"id": "By id", "newest": "Newest first"}
+
+
+@st.cache_resource(show_spinner=False)
+def get_client():
+    # One pooled client per server process, shared by every session and rerun,
+    # so the Key Vault lookup and the connect happen once.
+    return DBClient(pooled=True)
+
+
+@st.cache_data(ttl=USERS_CACHE_TTL, show_spinner=False)
+def load_users_page(order, after, page_size):
+    return users_page(get_client(), order=order, after=after, page_size=page_size)
+
+
+def users_browser():
+    st.header("Users")
+    columns = st.columns([2, 1, 1])
+    order = columns[0].radio("Order", list(ORDER_LABELS), format_func=ORDER_LABELS.get, horizontal=True)
+    page_size = columns[1].selectbox("Rows per page", [25, DEFAULT_PAGE_SIZE, 100, 250], index=1)
+    if columns[2].button("Refresh"):
+        load_users_page.clear()
+
+    # Keys of the pages we came through, so Previous needs no query of its own.
+    state = st.session_state
+    if state.get("users_view") != (order, page_size):
+        state.users_view = (order, page_size)
+        state.users_pages = [None]
+
+    try:
+        frame, next_key = load_users_page(order, state.users_pages[-1], page_size)
+    except Exception as e:
+        st.error(f"Could not load users: {e}")
+        return
+
+    if frame is None or frame.empty:
+        st.info("No users yet.")
+    else:
+        st.dataframe(frame, hide_index=True)
+
+    previous, label, following = st.columns([1, 2, 1])
+    label.caption(f"Page {len(state.users_pages)}")
+    if previous.button("Previous", disabled=len(state.users_pages) == 1):
+        state.users_pages.pop()
+        st.rerun()
+    if following.button("Next", disabled=next_key is None):
+        state.users_pages.append(next_key)
+        st.rerun()
+
+
 def main_ui():
     st.title("Hello from Azure!")
-    st.write("This is a simple Streamlit app.") 
-    st.write("Today is election day!") 
-
+    st.write("This is a simple Streamlit app.")
+    st.write("Today is election day!")
+    users_browser()
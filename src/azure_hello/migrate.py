@@ -1,10 +1,105 @@
-from .client import DBClient
+import hashlib
+import logging
+import os
+import re
+import time
 
-def get_create_table_sql():
-    with open('sql/users.sql', 'r') as file:
-        return file.read()
+from .client import DBClient, ScriptOutput, collect_results
+from .sql_script import split_batches
 
-def migrate_database():
-    client = DBClient()
-    client.execute_sql(get_create_table_sql())
-    client.close()
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join("sql", "migrations")
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# One round trip: create the ledger on first use and return everything applied so far.
+LEDGER_SQL = """
+IF OBJECT_ID(N'dbo.schema_migrations', N'U') IS NULL
+BEGIN
+    CREATE TABLE dbo.schema_migrations (
+        version INT PRIMARY KEY,
+        name NVARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        duration_ms INT NOT NULL,
+        applied_at DATETIME2 DEFAULT GETUTCDATE()
+    );
+END;
+SELECT version, name, checksum FROM dbo.schema_migrations ORDER BY version;
+"""
+
+RECORD_SQL = "INSERT INTO dbo.schema_migrations (version, name, checksum, duration_ms) VALUES (?, ?, ?, ?)"
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, "rb") as file:
+            self.sql = file.read().decode("utf-8").replace("\r\n", "\n")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Migrations named NNNN_description.sql, in version order."""
+    migrations = []
+    for file_name in os.listdir(directory):
+        match = _MIGRATION_FILE.match(file_name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, file_name)))
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {directory}.")
+    return migrations
+
+
+def applied_migrations(client):
+    output = client.execute_script(LEDGER_SQL)
+    applied = {}
+    if output.results:
+        for row in output.results[-1].itertuples(index=False):
+            applied[int(row.version)] = row.checksum.strip()
+    return applied
+
+
+def apply_migration(client, migration):
+    start = time.perf_counter()
+    output = ScriptOutput()
+    try:
+        with client.transaction() as cursor:
+            for batch, repeat in split_batches(migration.sql):
+                for _ in range(repeat):
+                    cursor.execute(batch)
+                    collect_results(cursor, output)
+            duration_ms = int((time.perf_counter() - start) * 1000)
+            cursor.execute(RECORD_SQL, (migration.version, migration.name, migration.checksum, duration_ms))
+    except Exception as e:
+        raise RuntimeError(f"Migration {migration.path} failed and was rolled back: {e}")
+    for message in output.messages:
+        logger.info("%s", message)
+    return duration_ms
+
+
+def migrate_database(client=None, directory=MIGRATIONS_DIR):
+    owns_client = client is None
+    client = client or DBClient()
+    try:
+        migrations = load_migrations(directory)
+        applied = applied_migrations(client)
+
+        for migration in migrations:
+            checksum = applied.get(migration.version)
+            if checksum is not None and checksum != migration.checksum:
+                raise RuntimeError(f"Migration {migration.path} was changed after it was applied (checksum mismatch). Add a new migration instead.")
+
+        pending = [migration for migration in migrations if migration.version not in applied]
+        logger.info("%d migration(s) already applied, %d pending.", len(applied), len(pending))
+        for migration in pending:
+            logger.info("Applying migration %04d_%s...", migration.version, migration.name)
+            duration_ms = apply_migration(client, migration)
+            logger.info("Applied migration %04d_%s in %s ms.", migration.version, migration.name, duration_ms)
+        return pending
+    finally:
+        if owns_client:
+            client.close()
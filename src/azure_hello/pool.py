@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(RuntimeError):
+    pass
+
+
+class _PooledConnection:
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = None
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    `connect` is a zero-argument factory returning a new connection. Idle
+    connections are pinged before being handed out once they have been idle
+    longer than `ping_after` seconds, and closed once idle longer than
+    `idle_timeout` (the pool never shrinks below `min_size`).
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, idle_timeout=300, ping_after=30, acquire_timeout=30):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool bounds: min_size={min_size}, max_size={max_size}")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def fill(self):
+        """Open connections until the pool holds at least `min_size`."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = _PooledConnection(self._connect())
+            except Exception:
+                self._discard_slot()
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed.")
+                    self._evict_idle()
+                    if self._idle:
+                        # LIFO keeps the warmest connections in use and lets the rest time out.
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(f"Timed out after {self.acquire_timeout}s waiting for a database connection (max_size={self.max_size}).")
+                    self._cond.wait(remaining)
+
+            if entry is None:
+                try:
+                    return _PooledConnection(self._connect())
+                except Exception:
+                    self._discard_slot()
+                    raise
+
+            if time.monotonic() - entry.last_used < self.ping_after or self._is_alive(entry.connection):
+                return entry
+            # Broken connection: drop it and loop to reconnect in its slot.
+            self._close_quietly(entry.connection)
+            self._discard_slot()
+
+    def release(self, entry, broken=False):
+        if broken and self._is_alive(entry.connection):
+            broken = False
+        if broken or self._closed:
+            self._close_quietly(entry.connection)
+            self._discard_slot()
+            return
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self):
+        entry = self.acquire()
+        try:
+            yield entry
+        except BaseException:
+            self.release(entry, broken=True)
+            raise
+        else:
+            self.release(entry)
+
+    @contextmanager
+    def connection(self):
+        with self.checkout() as entry:
+            yield entry.connection
+
+    def discard_idle(self):
+        """Close every idle connection, e.g. after a failover has invalidated them all."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_quietly(entry.connection)
+
+    def _evict_idle(self):
+        # Caller holds self._cond.
+        now = time.monotonic()
+        keep = []
+        for entry in self._idle:
+            expired = now - entry.last_used > self.idle_timeout
+            if expired and self._size - 1 >= self.min_size:
+                self._close_quietly(entry.connection)
+                self._size -= 1
+            else:
+                keep.append(entry)
+        self._idle = keep
+
+    def _discard_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _is_alive(connection):
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, connect, **options):
+    """Return the process-wide pool for `key`, creating it on first use.
+
+    A later caller asking for a larger `max_size` grows the shared pool;
+    other differing options keep the existing pool's values, with a warning.
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(connect, **options)
+            _pools[key] = pool
+            return pool
+    max_size = options.pop("max_size", None)
+    if max_size is not None and max_size > pool.max_size:
+        with pool._cond:
+            logger.info("Growing the shared connection pool from %d to %d connections.", pool.max_size, max_size)
+            pool.max_size = max_size
+            pool._cond.notify_all()
+    ignored = {name: value for name, value in options.items() if getattr(pool, name) != value}
+    if ignored:
+        current = ", ".join(f"{name}={getattr(pool, name)}" for name in ignored)
+        logger.warning("Shared connection pool already exists with %s; ignoring %s.",
+                       current, ", ".join(f"{name}={value}" for name, value in ignored.items()))
+    return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
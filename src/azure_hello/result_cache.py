@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 256
+_METADATA_KEY = b"azure_hello_result_cache"
+
+_TOKEN = re.compile(r"'(?:[^']|'')*'|\[[^\]]*\]|--[^\n]*|/\*.*?\*/|\s+|[^\s'\[]+|.", re.DOTALL)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE|MERGE)\s+((?:\[[^\]]+\]|\w+)(?:\.(?:\[[^\]]+\]|\w+))*)", re.IGNORECASE)
+_WRITE = re.compile(r"\b(?:INSERT|UPDATE|DELETE|MERGE|TRUNCATE|EXEC|EXECUTE|INTO)\b", re.IGNORECASE)
+_DDL = re.compile(r"\b(?:CREATE|ALTER|DROP)\b", re.IGNORECASE)
+_READ_START = re.compile(r"^(?:SELECT|WITH)\b", re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Drop comments and collapse whitespace outside string literals and [identifiers]."""
+    parts = []
+    for token in _TOKEN.findall(sql):
+        if token.startswith("--") or token.startswith("/*"):
+            token = " "
+        if token.isspace():
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+        parts.append(token)
+    return "".join(parts).strip()
+
+
+def _code_only(normalized_sql):
+    # Blank out literals so keywords inside strings do not count.
+    return re.sub(r"'(?:[^']|'')*'", "''", normalized_sql)
+
+
+def is_read_only(normalized_sql):
+    code = _code_only(normalized_sql)
+    return bool(_READ_START.match(code)) and not _WRITE.search(code) and not _DDL.search(code)
+
+
+def is_ddl(normalized_sql):
+    return bool(_DDL.search(_code_only(normalized_sql)))
+
+
+def referenced_tables(normalized_sql):
+    """Table names referenced by a statement, lowercased and without schema or brackets."""
+    tables = set()
+    for name in _TABLE_REF.findall(_code_only(normalized_sql)):
+        tables.add(name.split(".")[-1].strip("[]").lower())
+    return tables
+
+
+class ResultCache:
+    """TTL + LRU cache of read query results keyed by normalized SQL and params.
+
+    Entries are dropped when a write through the same client touches one of
+    their tables (DDL clears everything). With `disk_dir` set, results are
+    also written there as Parquet and survive process restarts; the disk tier
+    holds at most `max_entries` files too and drops expired ones on every write.
+    Callers get their own copy of a cached frame and may modify it.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, disk_dir=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def key(normalized_sql, params=()):
+        return json.dumps([normalized_sql, [repr(param) for param in params]])
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                frame, expires_at, _tables = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return frame.copy(deep=True)
+                del self._entries[key]
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._store(key, entry)
+        return entry[0].copy(deep=True)
+
+    def put(self, key, frame, tables):
+        # Keep a private copy: the caller that ran the query goes on to use (and may modify) `frame`.
+        entry = (frame.copy(deep=True), time.time() + self.ttl, frozenset(tables))
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def invalidate_tables(self, tables):
+        tables = {table.lower() for table in tables}
+        with self._lock:
+            stale = [key for key, (_frame, _expires, entry_tables) in self._entries.items() if entry_tables & tables]
+            for key in stale:
+                del self._entries[key]
+        if self.disk_dir:
+            for path in self._disk_files():
+                metadata = self._disk_metadata(path)
+                if metadata is None or tables & set(metadata["tables"]):
+                    _remove_quietly(path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.disk_dir:
+            for path in self._disk_files():
+                _remove_quietly(path)
+
+    def _store(self, key, entry):
+        # Caller holds self._lock.
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, hashlib.sha256(key.encode()).hexdigest() + ".parquet")
+
+    def _disk_files(self):
+        return [os.path.join(self.disk_dir, name) for name in os.listdir(self.disk_dir) if name.endswith(".parquet")]
+
+    def _disk_metadata(self, path):
+        import pyarrow.parquet as pq
+        try:
+            metadata = pq.read_schema(path).metadata or {}
+            return json.loads(metadata[_METADATA_KEY])
+        except Exception:
+            return None
+
+    def _write_disk(self, key, entry):
+        if not self.disk_dir:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        frame, expires_at, tables = entry
+        try:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_METADATA_KEY] = json.dumps({"key": key, "expires_at": expires_at, "tables": sorted(tables)})
+            path = self._disk_path(key)
+            pq.write_table(table.replace_schema_metadata(metadata), path + ".tmp")
+            # The file's mtime records its expiry, so sweeping needs only a stat per file.
+            os.utime(path + ".tmp", (expires_at, expires_at))
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            # The on-disk tier is best effort; the in-memory entry is still valid.
+            logger.warning("Could not write query result to the disk cache: %s", e)
+        self._sweep_disk()
+
+    def _sweep_disk(self):
+        """Remove expired files, then the soonest-expiring ones beyond `max_entries`."""
+        now = time.time()
+        files = []
+        for path in self._disk_files():
+            try:
+                expires_at = os.stat(path).st_mtime
+            except OSError:
+                continue
+            if expires_at <= now:
+                _remove_quietly(path)
+            else:
+                files.append((expires_at, path))
+        files.sort()
+        for _expires_at, path in files[:max(0, len(files) - self.max_entries)]:
+            _remove_quietly(path)
+
+    def _read_disk(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        if not os.path.exists(path):
+            return None
+        import pyarrow.parquet as pq
+        try:
+            table = pq.read_table(path)
+            metadata = json.loads(table.schema.metadata[_METADATA_KEY])
+        except Exception:
+            _remove_quietly(path)
+            return None
+        if metadata["key"] != key or metadata["expires_at"] <= now:
+            _remove_quietly(path)
+            return None
+        return table.to_pandas(), metadata["expires_at"], frozenset(metadata["tables"])
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Process-wide cache configured from QUERY_CACHE_TTL, QUERY_CACHE_MAX_ENTRIES and QUERY_CACHE_DIR."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache(
+                ttl=float(os.environ.get("QUERY_CACHE_TTL", DEFAULT_TTL)),
+                max_entries=int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                disk_dir=os.environ.get("QUERY_CACHE_DIR") or None,
+            )
+        return _default_cache
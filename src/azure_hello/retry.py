@@ -0,0 +1,160 @@
+import os
+import random
+import re
+import threading
+import time
+
+# Native Azure SQL error numbers that clear up on their own and are safe to retry.
+# https://learn.microsoft.com/azure/azure-sql/database/troubleshoot-common-errors-issues
+CONNECTION_ERROR_CODES = {
+    64, 233, 4060, 4221, 10053, 10054, 10060,
+    40143, 40197, 40613, 42108, 42109,
+}
+THROTTLING_ERROR_CODES = {10928, 10929, 40501, 40544, 40549, 40550, 49918, 49919, 49920}
+TRANSIENT_ERROR_CODES = CONNECTION_ERROR_CODES | THROTTLING_ERROR_CODES
+# 08xxx: connection failure, HYT0x: timeouts, 40001: deadlock victim.
+TRANSIENT_SQLSTATES = {"08001", "08S01", "08S02", "08007", "HYT00", "HYT01", "40001"}
+TRANSIENT_SQLITE_ERRORS = {"SQLITE_BUSY", "SQLITE_LOCKED"}
+# Login failed: not transient, but after a password rotation a fresh secret fixes it.
+LOGIN_FAILED_ERROR_CODES = {18456}
+
+# pyodbc formats each diagnostic record as "[SQLSTATE] message (native) (SQLFunction)" and appends
+# later records as "; [SQLSTATE] message (native)". Only a number in that position is an error code;
+# parenthesised numbers inside the message (e.g. a truncated value) are data.
+_NATIVE_CODE = re.compile(r"\((\d{1,6})\)(?=\s*(?:\(SQL\w+\)|;\s*\[|$))")
+
+
+def error_codes(error):
+    """(sqlstate, {native error numbers}) parsed from a pyodbc-style error."""
+    args = getattr(error, "args", ())
+    sqlstate = args[0] if len(args) > 1 and isinstance(args[0], str) and len(args[0]) == 5 else None
+    codes = {int(code) for arg in args for code in _NATIVE_CODE.findall(str(arg))}
+    return sqlstate, codes
+
+
+def is_throttling(error):
+    return bool(error_codes(error)[1] & THROTTLING_ERROR_CODES)
+
+
+def is_connection_error(error):
+    """True when the connection itself is gone and should not be reused."""
+    sqlstate, codes = error_codes(error)
+    return bool(codes & CONNECTION_ERROR_CODES) or (sqlstate or "").startswith("08")
+
+
+def is_login_failure(error):
+    sqlstate, codes = error_codes(error)
+    return sqlstate == "28000" or bool(codes & LOGIN_FAILED_ERROR_CODES)
+
+
+def is_transient(error):
+    if getattr(error, "sqlite_errorname", None) in TRANSIENT_SQLITE_ERRORS:
+        return True
+    sqlstate, codes = error_codes(error)
+    return sqlstate in TRANSIENT_SQLSTATES or bool(codes & TRANSIENT_ERROR_CODES)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter; throttling errors wait at least `throttle_delay`."""
+
+    def __init__(self, attempts=4, base_delay=0.5, max_delay=30.0, throttle_delay=10.0):
+        if attempts < 1:
+            raise ValueError(f"attempts must be at least 1, got {attempts}")
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.throttle_delay = throttle_delay
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            attempts=int(os.environ.get("DB_RETRY_ATTEMPTS", 4)),
+            max_delay=float(os.environ.get("DB_RETRY_MAX_DELAY", 30.0)),
+        )
+
+    def delay(self, attempt, error=None):
+        """Seconds to sleep before retry number `attempt` (0-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        if error is not None and is_throttling(error):
+            delay = max(delay, min(self.max_delay, self.throttle_delay) * random.uniform(1.0, 1.5))
+        return delay
+
+
+class CircuitBreaker:
+    """Stops calls for `reset_timeout` seconds after `failure_threshold` consecutive transient failures.
+
+    After the timeout one trial call is let through (half-open); its success
+    closes the circuit again, its failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            # The trial call may reconnect on the same thread; let its nested calls through.
+            if remaining <= 0 and self._trial_thread in (None, threading.get_ident()):
+                self._trial_thread = threading.get_ident()
+                return
+        raise CircuitOpenError(
+            f"Database circuit is open after {self._failures} consecutive transient failures; "
+            f"retry in {max(remaining, 0):.1f}s."
+        )
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_thread is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_thread = None
+
+    def release_trial(self):
+        """Give up the half-open trial slot without a verdict, e.g. when the call failed for a non-database reason."""
+        with self._lock:
+            if self._trial_thread == threading.get_ident():
+                self._trial_thread = None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(key):
+    """Process-wide breaker per database, shared by every client and pooled connection."""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=int(os.environ.get("DB_CIRCUIT_FAILURES", 5)),
+                reset_timeout=float(os.environ.get("DB_CIRCUIT_RESET", 30.0)),
+            )
+            _breakers[key] = breaker
+        return breaker
@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .client import DBClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SqlScript:
+    path: str
+    after: list = field(default_factory=list)
+
+
+@dataclass
+class ScriptResult:
+    path: str
+    status: str  # "ok", "failed" or "skipped"
+    seconds: float = 0.0
+    rows: int = 0
+    results: list = field(default_factory=list)
+    messages: list = field(default_factory=list)
+    error: str = None
+
+
+def load_scripts(source):
+    """Load scripts from a directory of .sql files or a JSON manifest.
+
+    A manifest looks like {"scripts": {"a.sql": [], "b.sql": ["a.sql"]}}: each
+    script maps to the scripts it must run after, with relative paths taken
+    from the manifest's directory. Scripts in a directory have no dependencies.
+    """
+    if os.path.isdir(source):
+        return [SqlScript(os.path.join(source, name)) for name in sorted(os.listdir(source)) if name.endswith(".sql")]
+
+    with open(source, "r") as file:
+        manifest = json.load(file)
+    base = os.path.dirname(source)
+
+    def resolve(path):
+        return os.path.normpath(os.path.join(base, path))
+
+    scripts = [SqlScript(resolve(path), [resolve(dep) for dep in deps]) for path, deps in manifest["scripts"].items()]
+
+    known = {script.path for script in scripts}
+    for script in scripts:
+        missing = [dep for dep in script.after if dep not in known]
+        if missing:
+            raise ValueError(f"{script.path} depends on scripts not in the manifest: {', '.join(missing)}")
+    _check_acyclic(scripts)
+    return scripts
+
+
+def _check_acyclic(scripts):
+    deps = {script.path: script.after for script in scripts}
+    done, visiting = set(), set()
+
+    def visit(path):
+        if path in done:
+            return
+        if path in visiting:
+            raise ValueError(f"Dependency cycle involving {path}")
+        visiting.add(path)
+        for dep in deps[path]:
+            visit(dep)
+        visiting.discard(path)
+        done.add(path)
+
+    for path in deps:
+        visit(path)
+
+
+def _run_one(client, script):
+    with open(script.path, "r") as file:
+        sql_script = file.read()
+    start = time.perf_counter()
+    try:
+        output = client.execute_script(sql_script)
+    except Exception as e:
+        return ScriptResult(script.path, "failed", time.perf_counter() - start, error=str(e))
+    return ScriptResult(script.path, "ok", time.perf_counter() - start, output.rows, output.results, output.messages)
+
+
+def run_scripts(scripts, client=None, max_workers=4):
+    """Run scripts on pooled connections, starting each as soon as its dependencies succeed.
+
+    Scripts whose dependencies failed are skipped. Returns ScriptResults in
+    the order the scripts were given.
+    """
+    if client is None:
+        client = DBClient(pooled=True, pool_max_size=max_workers)
+    pending = {script.path: script for script in scripts}
+    results = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            progressed = False
+            for path, script in list(pending.items()):
+                dep_results = [results.get(dep) for dep in script.after]
+                if any(r is not None and r.status != "ok" for r in dep_results):
+                    results[path] = ScriptResult(path, "skipped", error="a dependency did not succeed")
+                    del pending[path]
+                    progressed = True
+                elif all(r is not None for r in dep_results):
+                    logger.info("Starting %s...", path)
+                    running[executor.submit(_run_one, client, script)] = path
+                    del pending[path]
+                    progressed = True
+            if not running:
+                if progressed:
+                    continue
+                for path in pending:
+                    results[path] = ScriptResult(path, "skipped", error="unresolved dependency")
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                results[running.pop(future)] = result
+                logger.info("Finished %s: %s in %.3fs", result.path, result.status, result.seconds)
+    return [results[script.path] for script in scripts]
+
+
+def print_report(results):
+    width = max((len(result.path) for result in results), default=0)
+    print(f"\n{'script'.ljust(width)}  {'status':8} {'seconds':>9} {'rows':>8}")
+    for result in results:
+        print(f"{result.path.ljust(width)}  {result.status:8} {result.seconds:9.3f} {result.rows:8d}")
+        if result.error:
+            print(f"{''.ljust(width)}  error: {result.error}")
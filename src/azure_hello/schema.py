@@ -0,0 +1,157 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = os.environ.get("SCHEMA_SNAPSHOT_PATH", "schema_snapshot.json")
+_MAX_PARAMS_PER_QUERY = 500
+
+TABLE_VERSIONS_SQL = """
+SELECT s.name AS TABLE_SCHEMA, o.name AS TABLE_NAME, o.modify_date AS MODIFY_DATE
+FROM sys.objects o
+JOIN sys.schemas s ON s.schema_id = o.schema_id
+WHERE o.type IN ('U', 'V') AND o.is_ms_shipped = 0
+"""
+
+# Same shape as sql/show.sql, restricted to the tables that changed.
+COLUMNS_SQL = """
+SELECT
+    c.TABLE_SCHEMA,
+    c.TABLE_NAME,
+    c.COLUMN_NAME,
+    c.DATA_TYPE,
+    c.CHARACTER_MAXIMUM_LENGTH,
+    c.NUMERIC_PRECISION,
+    c.NUMERIC_SCALE,
+    c.IS_NULLABLE,
+    CASE WHEN pk.COLUMN_NAME IS NOT NULL THEN 'YES' ELSE 'NO' END AS IS_PRIMARY_KEY
+FROM INFORMATION_SCHEMA.COLUMNS c
+LEFT JOIN (
+    SELECT k.TABLE_SCHEMA, k.TABLE_NAME, k.COLUMN_NAME
+    FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS i
+    JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k ON i.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+    WHERE i.CONSTRAINT_TYPE = 'PRIMARY KEY'
+) pk ON c.TABLE_SCHEMA = pk.TABLE_SCHEMA AND c.TABLE_NAME = pk.TABLE_NAME AND c.COLUMN_NAME = pk.COLUMN_NAME
+WHERE c.TABLE_SCHEMA + '.' + c.TABLE_NAME IN ({placeholders})
+ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+
+class SchemaSnapshot:
+    """Table and column metadata keyed by "schema.table", stamped with each table's sys.objects.modify_date."""
+
+    def __init__(self, tables=None, taken_at=None):
+        self.tables = tables or {}
+        self.taken_at = taken_at
+
+    def table(self, name):
+        """Look up a table by "schema.table", or by bare name in any schema."""
+        if name in self.tables:
+            return self.tables[name]
+        for qualified, table in self.tables.items():
+            if qualified.split(".", 1)[1] == name:
+                return table
+        raise KeyError(f"Table '{name}' is not in the schema snapshot.")
+
+    def columns(self, name):
+        return self.table(name)["columns"]
+
+    def to_dict(self):
+        return {"version": SNAPSHOT_VERSION, "taken_at": self.taken_at, "tables": self.tables}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != SNAPSHOT_VERSION:
+            return cls()
+        return cls(data["tables"], data.get("taken_at"))
+
+    def rows(self):
+        """Flatten to the same columns sql/show.sql returns."""
+        for qualified in sorted(self.tables):
+            schema_name, table_name = qualified.split(".", 1)
+            for column in self.tables[qualified]["columns"]:
+                yield {"TABLE_SCHEMA": schema_name, "TABLE_NAME": table_name, **column}
+
+
+def load_snapshot(path=DEFAULT_SNAPSHOT_PATH):
+    try:
+        with open(path, "r") as file:
+            return SchemaSnapshot.from_dict(json.load(file))
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return SchemaSnapshot()
+
+
+def save_snapshot(snapshot, path=DEFAULT_SNAPSHOT_PATH):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(snapshot.to_dict(), file, separators=(",", ":"), default=str)
+    os.replace(tmp_path, path)
+
+
+def refresh_snapshot(client, path=DEFAULT_SNAPSHOT_PATH):
+    """Bring the on-disk snapshot up to date, reloading only tables whose modify_date changed."""
+    snapshot = load_snapshot(path)
+    versions = client.execute(TABLE_VERSIONS_SQL, use_cache=False)
+    current = {}
+    if versions is not None:
+        for row in versions.itertuples(index=False):
+            current[f"{row.TABLE_SCHEMA}.{row.TABLE_NAME}"] = str(row.MODIFY_DATE)
+
+    changed = [name for name, modified in current.items()
+               if name not in snapshot.tables or snapshot.tables[name]["modify_date"] != modified]
+    dropped = [name for name in snapshot.tables if name not in current]
+    logger.info("Schema snapshot: %d changed, %d dropped, %d unchanged tables.", len(changed), len(dropped), len(current) - len(changed))
+
+    for name in dropped:
+        del snapshot.tables[name]
+    for name in changed:
+        snapshot.tables[name] = {"modify_date": current[name], "columns": []}
+    for start in range(0, len(changed), _MAX_PARAMS_PER_QUERY):
+        names = changed[start:start + _MAX_PARAMS_PER_QUERY]
+        sql = COLUMNS_SQL.format(placeholders=", ".join("?" for _ in names))
+        columns = client.execute(sql, names, use_cache=False)
+        if columns is None:
+            continue
+        for row in columns.to_dict("records"):
+            qualified = f"{row.pop('TABLE_SCHEMA')}.{row.pop('TABLE_NAME')}"
+            snapshot.tables[qualified]["columns"].append(_clean(row))
+
+    if changed or dropped or snapshot.taken_at is None:
+        snapshot.taken_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        save_snapshot(snapshot, path)
+    return snapshot
+
+
+def _clean(row):
+    # NaN from pandas for NULL numeric metadata -> None, numpy scalars -> Python ints.
+    cleaned = {}
+    for key, value in row.items():
+        if value is None or value != value:
+            cleaned[key] = None
+        elif hasattr(value, "item"):
+            cleaned[key] = value.item()
+        else:
+            cleaned[key] = value
+    return cleaned
+
+
+_cached = {}
+_cached_lock = threading.Lock()
+
+
+def get_schema(path=DEFAULT_SNAPSHOT_PATH):
+    """Snapshot loaded once per process (reloaded if the file changes on disk)."""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+    with _cached_lock:
+        cached = _cached.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, load_snapshot(path))
+            _cached[path] = cached
+        return cached[1]
@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600
+DEFAULT_REFRESH_AHEAD = 300
+
+
+class KeyVaultSecretBackend:
+    def __init__(self, vault_uri):
+        self.vault_uri = vault_uri
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _secret_client(self):
+        # Credential discovery is the slow part; the process-wide credential does it
+        # once and its token cache serves every later fetch.
+        with self._lock:
+            if self._client is None:
+                from azure.keyvault.secrets import SecretClient
+                from .azure_context import get_credential
+                self._client = SecretClient(vault_url=self.vault_uri, credential=get_credential())
+            return self._client
+
+    def get(self, name):
+        return self._secret_client().get_secret(name).value
+
+    def describe(self):
+        return f"Key Vault '{self.vault_uri}'"
+
+
+class EnvSecretBackend:
+    """Reads secret `my-server-password` from env var MY_SERVER_PASSWORD."""
+
+    @staticmethod
+    def env_var(name):
+        return re.sub(r"[^A-Za-z0-9]", "_", name).upper()
+
+    def get(self, name):
+        value = os.environ.get(self.env_var(name))
+        if value is None:
+            raise KeyError(f"Environment variable {self.env_var(name)} is not set.")
+        return value
+
+    def describe(self):
+        return "environment variables"
+
+
+class FileSecretBackend:
+    """Reads secrets from a JSON file mapping secret names to values."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def get(self, name):
+        with open(self.path, "r") as file:
+            secrets = json.load(file)
+        if name not in secrets:
+            raise KeyError(f"Secret '{name}' not found in {self.path}.")
+        return secrets[name]
+
+    def describe(self):
+        return f"file '{self.path}'"
+
+
+class SecretCache:
+    """Caches secrets for `ttl` seconds.
+
+    Reads within `refresh_ahead` seconds of expiry return the cached value
+    and refresh it on a background thread, so callers only block on the very
+    first fetch (or after the value has fully expired).
+    """
+
+    def __init__(self, backend, ttl=DEFAULT_TTL, refresh_ahead=DEFAULT_REFRESH_AHEAD):
+        self.backend = backend
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl / 2)
+        self._values = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+
+    def get(self, name):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(name)
+            if cached is not None:
+                value, fetched_at = cached
+                age = now - fetched_at
+                if age < self.ttl:
+                    if age >= self.ttl - self.refresh_ahead and name not in self._refreshing:
+                        self._refreshing.add(name)
+                        threading.Thread(target=self._background_refresh, args=(name,), daemon=True).start()
+                    return value
+        with self._fetch_lock:
+            # Another thread may have fetched it while we waited.
+            with self._lock:
+                cached = self._values.get(name)
+            if cached is not None and time.monotonic() - cached[1] < self.ttl:
+                return cached[0]
+            return self.refresh(name)
+
+    def refresh(self, name):
+        logger.info("Fetching secret '%s' from %s...", name, self.backend.describe())
+        value = self.backend.get(name)
+        with self._lock:
+            self._values[name] = (value, time.monotonic())
+        return value
+
+    def invalidate(self, name=None):
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+    def _background_refresh(self, name):
+        try:
+            self.refresh(name)
+        except Exception as e:
+            # Keep serving the cached value until it expires.
+            logger.warning("Background refresh of secret '%s' failed: %s", name, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def secret_backend_name():
+    return os.environ.get("SECRET_BACKEND", "keyvault").lower()
+
+
+def _make_backend(keyvault_uri):
+    backend = secret_backend_name()
+    if backend == "keyvault":
+        if not keyvault_uri:
+            raise ValueError("KEYVAULT_NAME must be set when SECRET_BACKEND is 'keyvault'.")
+        return KeyVaultSecretBackend(keyvault_uri)
+    if backend == "env":
+        return EnvSecretBackend()
+    if backend == "file":
+        path = os.environ.get("SECRET_FILE")
+        if not path:
+            raise ValueError("SECRET_FILE must be set when SECRET_BACKEND is 'file'.")
+        return FileSecretBackend(path)
+    raise ValueError(f"Unknown SECRET_BACKEND '{backend}'. Use 'keyvault', 'env' or 'file'.")
+
+
+def get_secret_cache(keyvault_uri=None):
+    """Return the process-wide secret cache for the configured backend."""
+    key = (secret_backend_name(), keyvault_uri, os.environ.get("SECRET_FILE"))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = SecretCache(
+                _make_backend(keyvault_uri),
+                ttl=float(os.environ.get("SECRET_CACHE_TTL", DEFAULT_TTL)),
+            )
+            _caches[key] = cache
+        return cache
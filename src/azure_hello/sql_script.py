@@ -0,0 +1,62 @@
+import re
+
+_GO_LINE = re.compile(r"^\s*GO(?:\s+(\d+))?\s*;?\s*(?:--.*)?$", re.IGNORECASE)
+_DRIVER_PREFIX = re.compile(r"^(?:\[[^\]]*\])+")
+
+
+def split_batches(sql_script):
+    """Split a T-SQL script on `GO` separator lines into (batch, repeat) pairs.
+
+    `GO` is a client-side separator (sqlcmd/SSMS), not T-SQL, so it has to be
+    handled here. `GO n` repeats the preceding batch n times. Lines inside
+    block comments or multi-line string literals are never treated as
+    separators. Empty batches are dropped.
+    """
+    batches = []
+    current = []
+    in_comment = False
+    in_string = False
+    for line in sql_script.splitlines():
+        if not in_comment and not in_string:
+            match = _GO_LINE.match(line)
+            if match:
+                _append(batches, current, int(match.group(1) or 1))
+                current = []
+                continue
+        current.append(line)
+        in_comment, in_string = _scan_state(line, in_comment, in_string)
+    _append(batches, current, 1)
+    return batches
+
+
+def _append(batches, lines, repeat):
+    batch = "\n".join(lines).strip()
+    if batch:
+        batches.append((batch, repeat))
+
+
+def _scan_state(line, in_comment, in_string):
+    i = 0
+    while i < len(line):
+        two = line[i:i + 2]
+        if in_comment:
+            if two == "*/":
+                in_comment = False
+                i += 1
+        elif in_string:
+            if line[i] == "'":
+                in_string = False
+        elif two == "--":
+            break
+        elif two == "/*":
+            in_comment = True
+            i += 1
+        elif line[i] == "'":
+            in_string = True
+        i += 1
+    return in_comment, in_string
+
+
+def clean_message(message):
+    """Strip the driver's [vendor][driver][server] prefix from a PRINT/info message."""
+    return _DRIVER_PREFIX.sub("", message).strip()
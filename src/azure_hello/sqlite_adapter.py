@@ -0,0 +1,420 @@
+"""pyodbc-shaped wrapper around sqlite3 that understands the T-SQL used in sql/.
+
+Only the subset this repo needs is translated: IDENTITY, GETUTCDATE(),
+NVARCHAR, N'...' literals, [bracketed] and dbo.-qualified names, TOP n,
+OBJECT_ID(...), '+' string concatenation, the INFORMATION_SCHEMA views read
+by sql/show.sql, the sys.objects/sys.schemas columns read by schema.py, PRINT,
+and IF [NOT] EXISTS (...) BEGIN ... END [ELSE BEGIN ... END] blocks.
+"""
+import datetime
+import re
+import sqlite3
+
+_TOKEN = re.compile(r"N?'(?:[^']|'')*'|\[[^\]]*\]|\"[^\"]*\"|--[^\n]*|/\*.*?\*/|\s+|\w+|.", re.DOTALL)
+
+_INFORMATION_SCHEMA = {
+    "TABLES": (
+        "(SELECT 'dbo' AS TABLE_SCHEMA, name AS TABLE_NAME, 'BASE TABLE' AS TABLE_TYPE "
+        "FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%')"
+    ),
+    "COLUMNS": (
+        "(SELECT 'dbo' AS TABLE_SCHEMA, m.name AS TABLE_NAME, p.name AS COLUMN_NAME, p.cid + 1 AS ORDINAL_POSITION, "
+        "lower(p.type) AS DATA_TYPE, NULL AS CHARACTER_MAXIMUM_LENGTH, NULL AS NUMERIC_PRECISION, NULL AS NUMERIC_SCALE, "
+        "CASE WHEN p.\"notnull\" OR p.pk > 0 THEN 'NO' ELSE 'YES' END AS IS_NULLABLE "
+        "FROM sqlite_master m JOIN pragma_table_info(m.name) p WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%')"
+    ),
+    "TABLE_CONSTRAINTS": (
+        "(SELECT 'dbo' AS TABLE_SCHEMA, m.name AS TABLE_NAME, 'PK_' || m.name AS CONSTRAINT_NAME, "
+        "'PRIMARY KEY' AS CONSTRAINT_TYPE FROM sqlite_master m "
+        "WHERE m.type = 'table' AND EXISTS (SELECT 1 FROM pragma_table_info(m.name) WHERE pk > 0))"
+    ),
+    "KEY_COLUMN_USAGE": (
+        "(SELECT 'dbo' AS TABLE_SCHEMA, m.name AS TABLE_NAME, p.name AS COLUMN_NAME, 'PK_' || m.name AS CONSTRAINT_NAME "
+        "FROM sqlite_master m JOIN pragma_table_info(m.name) p WHERE m.type = 'table' AND p.pk > 0)"
+    ),
+}
+
+# SQLite keeps no modification time; a table's CREATE statement (rewritten by
+# ALTER TABLE) serves as modify_date, since schema.py only compares it for changes.
+_SYS = {
+    "OBJECTS": (
+        "(SELECT name, 1 AS schema_id, CASE type WHEN 'view' THEN 'V' ELSE 'U' END AS type, "
+        "0 AS is_ms_shipped, sql AS modify_date "
+        "FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%')"
+    ),
+    "SCHEMAS": "(SELECT 1 AS schema_id, 'dbo' AS name)",
+}
+
+_REWRITES = [
+    (re.compile(r"\bINT\s+PRIMARY\s+KEY\s+IDENTITY\s*\(\s*\d+\s*,\s*\d+\s*\)", re.IGNORECASE), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bIDENTITY\s*\(\s*\d+\s*,\s*\d+\s*\)", re.IGNORECASE), ""),
+    (re.compile(r"\b(?:GETUTCDATE|SYSUTCDATETIME)\s*\(\s*\)", re.IGNORECASE), "(strftime('%Y-%m-%d %H:%M:%f', 'now'))"),
+    (re.compile(r"\bN?VARCHAR\s*\(\s*(?:\d+|MAX)\s*\)", re.IGNORECASE), "TEXT"),
+    (re.compile(r"\bOBJECT_ID\s*\(\s*N?'(?:\w+\.)?(\w+)'\s*(?:,\s*N?'\w+'\s*)?\)", re.IGNORECASE),
+     r"(SELECT 1 FROM sqlite_master WHERE name = '\1')"),
+    (re.compile(r"\bINFORMATION_SCHEMA\.(\w+)", re.IGNORECASE), lambda m: _INFORMATION_SCHEMA.get(m.group(1).upper(), m.group(0))),
+    (re.compile(r"\bsys\.(\w+)", re.IGNORECASE), lambda m: _SYS.get(m.group(1).upper(), m.group(0))),
+    (re.compile(r"(?:\bdbo|\"dbo\")\.", re.IGNORECASE), ""),
+]
+_TOP = re.compile(r"^(\s*SELECT\s+)TOP\s*\(?\s*(\d+|\?)\s*\)?\s+", re.IGNORECASE)
+_PRINT = re.compile(r"^\s*PRINT\s+(.*?)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+
+_DATETIME_TYPES = ("DATETIME2", "DATETIME")
+
+
+def _parse_datetime(value):
+    # Columns are picked by name, so an alias can put other text here; leave that as it is.
+    if not isinstance(value, str):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def _adapt_datetime(value):
+    # Same text GETUTCDATE() stores (millisecond precision when that is exact), so
+    # datetime parameters compare equal to stored values.
+    text = value.isoformat(" ", timespec="microseconds")
+    return text[:-3] if text.endswith("000") else text
+
+
+def _adapt_params(params):
+    # Done here rather than with sqlite3.register_adapter, which would change every sqlite3 user in the process.
+    return [_adapt_datetime(value) if isinstance(value, datetime.datetime) else value for value in params]
+
+
+def translate(statement):
+    """Rewrite one T-SQL statement into SQLite SQL."""
+    tokens = _TOKEN.findall(statement)
+    statement = "".join(_translate_token(tokens, i) for i in range(len(tokens)))
+    for pattern, replacement in _REWRITES:
+        statement = pattern.sub(replacement, statement)
+    top = _TOP.match(statement)
+    if top:
+        statement = top.group(1) + statement[top.end():].rstrip().rstrip(";") + f" LIMIT {top.group(2)}"
+    return statement
+
+
+def _translate_token(tokens, i):
+    token = tokens[i]
+    if token == "+" and (_is_string(_neighbour(tokens, i, -1)) or _is_string(_neighbour(tokens, i, 1))):
+        return "||"
+    if token.startswith("N'"):
+        return token[1:]
+    if token.startswith("[") and token.endswith("]"):
+        return '"' + token[1:-1] + '"'
+    return token
+
+
+def _neighbour(tokens, i, step):
+    i += step
+    while 0 <= i < len(tokens) and tokens[i].isspace():
+        i += step
+    return tokens[i] if 0 <= i < len(tokens) else ""
+
+
+def _is_string(token):
+    return token.startswith(("'", "N'"))
+
+
+class _Tokens:
+    def __init__(self, sql):
+        self.tokens = [token for token in _TOKEN.findall(sql)]
+        self.pos = 0
+
+    def peek_word(self):
+        pos = self._skip(self.pos)
+        return self.tokens[pos].upper() if pos < len(self.tokens) else None
+
+    def take_word(self):
+        self.pos = self._skip(self.pos) + 1
+
+    def _skip(self, pos):
+        while pos < len(self.tokens) and (self.tokens[pos].isspace() or self.tokens[pos].startswith(("--", "/*"))):
+            pos += 1
+        return pos
+
+
+def parse_batch(sql):
+    """Parse a batch into a list of ("sql", text) / ("print", expr) / ("if", cond, then, else) nodes."""
+    tokens = _Tokens(sql)
+    return _parse_block(tokens, top_level=True)
+
+
+def _parse_block(tokens, top_level=False):
+    nodes = []
+    while True:
+        word = tokens.peek_word()
+        if word is None:
+            if not top_level:
+                raise sqlite3.OperationalError("BEGIN without matching END")
+            return nodes
+        if word == "END" and not top_level:
+            tokens.take_word()
+            return nodes
+        if word == ";":
+            tokens.take_word()
+        elif word == "IF":
+            nodes.append(_parse_if(tokens))
+        else:
+            nodes.append(_parse_statement(tokens))
+
+
+def _parse_if(tokens):
+    tokens.take_word()
+    condition = []
+    depth = 0
+    while True:
+        if tokens.pos >= len(tokens.tokens):
+            raise sqlite3.OperationalError("IF without BEGIN")
+        token = tokens.tokens[tokens.pos]
+        if depth == 0 and token.upper() == "BEGIN":
+            break
+        depth += token == "("
+        depth -= token == ")"
+        condition.append(token)
+        tokens.pos += 1
+    tokens.take_word()
+    then_block = _parse_block(tokens)
+    else_block = []
+    if tokens.peek_word() == "ELSE":
+        tokens.take_word()
+        if tokens.peek_word() == "BEGIN":
+            tokens.take_word()
+            else_block = _parse_block(tokens)
+        else:
+            else_block = [_parse_statement(tokens)]
+    return ("if", "".join(condition).strip(), then_block, else_block)
+
+
+def _parse_statement(tokens):
+    parts = []
+    depth = 0
+    case_depth = 0
+    while tokens.pos < len(tokens.tokens):
+        token = tokens.tokens[tokens.pos]
+        upper = token.upper()
+        if depth == 0 and case_depth == 0 and (token == ";" or upper in ("END", "ELSE")):
+            break
+        # Statements without a trailing ';' end where the next IF/PRINT starts.
+        if depth == 0 and parts and upper in ("IF", "PRINT") and "".join(parts).strip():
+            break
+        depth += token == "("
+        depth -= token == ")"
+        case_depth += upper == "CASE"
+        case_depth -= upper == "END" and case_depth > 0
+        parts.append(token)
+        tokens.pos += 1
+    if tokens.pos < len(tokens.tokens) and tokens.tokens[tokens.pos] == ";":
+        tokens.pos += 1
+    text = "".join(parts).strip()
+    match = _PRINT.match(text)
+    if match:
+        return ("print", match.group(1))
+    return ("sql", text)
+
+
+class _Result:
+    def __init__(self, description=None, rows=None, cursor=None, rowcount=-1, datetime_columns=()):
+        self.description = description
+        self.rows = rows or []
+        self.cursor = cursor
+        self.rowcount = rowcount
+        self.messages = []
+        self.datetime_columns = datetime_columns
+
+    def convert(self, rows):
+        if not self.datetime_columns:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for index in self.datetime_columns:
+                row[index] = _parse_datetime(row[index])
+            converted.append(tuple(row))
+        return converted
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.arraysize = 1
+        self.fast_executemany = False
+        self._results = []
+        self._index = 0
+
+    @property
+    def _current(self):
+        return self._results[self._index] if self._index < len(self._results) else None
+
+    @property
+    def description(self):
+        current = self._current
+        return current.description if current else None
+
+    @property
+    def rowcount(self):
+        current = self._current
+        return current.rowcount if current else -1
+
+    @property
+    def messages(self):
+        current = self._current
+        return [("[01000] (0)", message) for message in current.messages] if current else []
+
+    def execute(self, sql, *params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = params[0]
+        self._results = []
+        self._index = 0
+        pending_messages = []
+        nodes = parse_batch(sql)
+        self._run(nodes, list(params), pending_messages, last=True)
+        if pending_messages:
+            if not self._results:
+                self._results.append(_Result())
+            self._results[-1].messages.extend(pending_messages)
+        return self
+
+    def _run(self, nodes, params, pending_messages, last):
+        for i, node in enumerate(nodes):
+            kind = node[0]
+            if kind == "print":
+                pending_messages.append(str(self._scalar(f"SELECT {translate(node[1])}", [])))
+            elif kind == "if":
+                branch = node[2] if self._scalar(f"SELECT CASE WHEN {translate(node[1])} THEN 1 ELSE 0 END", params) else node[3]
+                self._run(branch, params, pending_messages, last and i == len(nodes) - 1)
+            elif node[1]:
+                self._run_sql(node[1], params, pending_messages, last and i == len(nodes) - 1)
+
+    def _run_sql(self, statement, params, pending_messages, keep_open):
+        statement = translate(statement)
+        count = _count_placeholders(statement)
+        bound, params[:] = params[:count], params[count:]
+        self.connection._begin_if_needed()
+        cursor = self.connection._raw.cursor()
+        cursor.execute(statement, _adapt_params(bound))
+        if cursor.description is None:
+            result = _Result(rowcount=cursor.rowcount)
+            cursor.close()
+        else:
+            datetime_columns = self.connection._datetime_columns(cursor.description)
+            if keep_open:
+                # The final result of a batch streams straight from SQLite.
+                result = _Result(cursor.description, cursor=cursor, datetime_columns=datetime_columns)
+            else:
+                result = _Result(cursor.description, cursor.fetchall(), datetime_columns=datetime_columns)
+                result.rows = result.convert(result.rows)
+                cursor.close()
+        result.messages.extend(pending_messages)
+        pending_messages.clear()
+        self._results.append(result)
+
+    def _scalar(self, sql, params):
+        count = _count_placeholders(sql)
+        bound, params[:] = params[:count], params[count:]
+        row = self.connection._raw.execute(sql, _adapt_params(bound)).fetchone()
+        return row[0] if row else None
+
+    def executemany(self, sql, seq_of_params):
+        self.connection._begin_if_needed()
+        rows = (_adapt_params(params) for params in seq_of_params)
+        self._results = [_Result(rowcount=self.connection._raw.executemany(translate(sql), rows).rowcount)]
+        self._index = 0
+
+    def fetchmany(self, size=None):
+        current = self._current
+        if current is None or current.description is None:
+            raise sqlite3.ProgrammingError("No results. Previous SQL was not a query.")
+        size = size or self.arraysize
+        if current.cursor is not None:
+            return current.convert(current.cursor.fetchmany(size))
+        rows, current.rows = current.rows[:size], current.rows[size:]
+        return rows
+
+    def fetchall(self):
+        current = self._current
+        if current is None or current.description is None:
+            raise sqlite3.ProgrammingError("No results. Previous SQL was not a query.")
+        if current.cursor is not None:
+            return current.convert(current.cursor.fetchall())
+        rows, current.rows = current.rows, []
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def nextset(self):
+        current = self._current
+        if current is not None and current.cursor is not None:
+            current.cursor.close()
+        self._index += 1
+        return self._index < len(self._results)
+
+    def close(self):
+        for result in self._results:
+            if result.cursor is not None:
+                result.cursor.close()
+        self._results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same as pyodbc: commit on clean exit when not in autocommit mode.
+        if exc_type is None and not self.connection.autocommit:
+            self.connection.commit()
+        self.close()
+
+
+def _count_placeholders(sql):
+    return sum(1 for token in _TOKEN.findall(sql) if token == "?")
+
+
+class SQLiteConnection:
+    def __init__(self, database, uri=False):
+        self._raw = sqlite3.connect(
+            database,
+            uri=uri,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.autocommit = True
+        self._datetime_names = (None, frozenset())
+
+    def _datetime_columns(self, description):
+        """Indexes of result columns named like a DATETIME2/DATETIME column of some table.
+
+        sqlite3 does not report declared types per result column without
+        PARSE_DECLTYPES, so values that do not parse are returned unchanged.
+        Converting here keeps this connection's behaviour out of sqlite3's
+        process-wide converter registry (which PARSE_DECLTYPES would need).
+        """
+        version = self._raw.execute("PRAGMA schema_version").fetchone()[0]
+        if self._datetime_names[0] != version:
+            names = self._raw.execute(
+                "SELECT p.name, p.type FROM sqlite_master m JOIN pragma_table_info(m.name) p WHERE m.type = 'table'"
+            ).fetchall()
+            self._datetime_names = (version, frozenset(name.lower() for name, type_ in names if type_.upper() in _DATETIME_TYPES))
+        return [index for index, column in enumerate(description) if column[0].lower() in self._datetime_names[1]]
+
+    def _begin_if_needed(self):
+        if not self.autocommit and not self._raw.in_transaction:
+            self._raw.execute("BEGIN")
+
+    def cursor(self):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        if self._raw.in_transaction:
+            self._raw.execute("COMMIT")
+
+    def rollback(self):
+        if self._raw.in_transaction:
+            self._raw.execute("ROLLBACK")
+
+    def close(self):
+        self._raw.close()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+DEFAULT_STATEMENT_CACHE_SIZE = 64
+
+
+class StatementCache:
+    """Per-connection LRU of cursors keyed by SQL text.
+
+    pyodbc keeps the last prepared statement on each cursor and skips
+    SQLPrepare when the same SQL string is executed again, so holding one
+    cursor per distinct statement lets repeated parameterized queries reuse
+    their prepared handle (and the server-side plan) instead of re-preparing.
+    """
+
+    def __init__(self, connection, max_size=DEFAULT_STATEMENT_CACHE_SIZE):
+        if max_size < 1:
+            raise ValueError(f"max_size must be positive, got {max_size}")
+        self.connection = connection
+        self.max_size = max_size
+        self._cursors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def cursor(self, sql):
+        cursor = self._cursors.get(sql)
+        if cursor is not None:
+            self._cursors.move_to_end(sql)
+            self.hits += 1
+            return cursor
+        self.misses += 1
+        cursor = self.connection.cursor()
+        self._cursors[sql] = cursor
+        if len(self._cursors) > self.max_size:
+            _evicted_sql, evicted = self._cursors.popitem(last=False)
+            _close_quietly(evicted)
+        return cursor
+
+    def discard(self, sql):
+        cursor = self._cursors.pop(sql, None)
+        if cursor is not None:
+            _close_quietly(cursor)
+
+    def clear(self):
+        cursors, self._cursors = list(self._cursors.values()), OrderedDict()
+        for cursor in cursors:
+            _close_quietly(cursor)
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
@@ -0,0 +1,44 @@
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+USER_COLUMNS = "id, username, email, created_at"
+
+# Keyset pagination: each page starts after the last row of the previous one, so the
+# server seeks straight to it through the primary key instead of counting OFFSET rows.
+# "newest" pages on id DESC rather than created_at: ids are unique and follow insertion
+# order, whereas created_at ties within a bulk_insert batch, can be NULL, and keeps
+# 100 ns digits that do not survive the round trip through a Python datetime.
+ORDERINGS = {
+    "id": {
+        "first": f"SELECT TOP {{limit}} {USER_COLUMNS} FROM dbo.users ORDER BY id",
+        "after": f"SELECT TOP {{limit}} {USER_COLUMNS} FROM dbo.users WHERE id > ? ORDER BY id",
+    },
+    "newest": {
+        "first": f"SELECT TOP {{limit}} {USER_COLUMNS} FROM dbo.users ORDER BY id DESC",
+        "after": f"SELECT TOP {{limit}} {USER_COLUMNS} FROM dbo.users WHERE id < ? ORDER BY id DESC",
+    },
+}
+
+
+def users_page(client, order="id", after=None, page_size=DEFAULT_PAGE_SIZE):
+    """Return (frame, next_key) for one page of dbo.users.
+
+    `after` is the next_key of the previous page (None for the first page);
+    next_key is None on the last page. One extra row is fetched to tell
+    whether another page exists, so no COUNT(*) over the table is needed.
+    """
+    if order not in ORDERINGS:
+        raise ValueError(f"Unknown users ordering '{order}', expected one of {sorted(ORDERINGS)}.")
+    page_size = int(page_size)
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}, got {page_size}")
+    ordering = ORDERINGS[order]
+    # The page size is inlined (it is a validated int) so each size maps to one cached statement.
+    if after is None:
+        frame = client.execute(ordering["first"].format(limit=page_size + 1), use_cache=False)
+    else:
+        frame = client.execute(ordering["after"].format(limit=page_size + 1), list(after), use_cache=False)
+    if frame is None or len(frame) <= page_size:
+        return frame, None
+    frame = frame.iloc[:page_size]
+    return frame, (int(frame["id"].iloc[-1]),)
@@ -0,0 +1,142 @@
+"""Start-up warm-up and the readiness/health endpoint for the app container.
+
+start() runs once per process: it serves /healthz, /readyz and /metrics on
+HEALTH_PORT and, in the background, imports the heavy modules, fills the
+secret and connection pool caches and runs a cheap query. /readyz answers
+503 until that has succeeded, so ACI only routes users to a warm process.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .instrumentation import HistogramExporter, add_hook
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_PORT = 8502
+RETRY_INTERVAL = 15
+READY_SQL = "SELECT 1 AS ready"
+
+exporter = HistogramExporter()
+_state = {"status": "starting", "steps": {}, "error": None, "ready_at": None}
+_state_lock = threading.Lock()
+_started = False
+_started_lock = threading.Lock()
+
+
+def state():
+    with _state_lock:
+        return {**_state, "steps": dict(_state["steps"])}
+
+
+def is_ready():
+    with _state_lock:
+        return _state["status"] == "ready"
+
+
+def _step(name, run):
+    start = time.perf_counter()
+    result = run()
+    with _state_lock:
+        _state["steps"][name] = round(time.perf_counter() - start, 3)
+    logger.info("Warm-up step '%s' took %.3fs.", name, time.perf_counter() - start)
+    return result
+
+
+def _import_heavy_modules():
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+    from . import columnar, main_ui  # noqa: F401
+
+
+def _client():
+    from .client import DBClient
+    # Fetches the SQL password into the secret cache and sets up the shared pool the UI's client uses.
+    return DBClient(pooled=True)
+
+
+def warm_up():
+    """Run every warm-up step once; returns True when the app is ready to serve."""
+    with _state_lock:
+        _state["status"] = "warming"
+    try:
+        _step("imports", _import_heavy_modules)
+        try:
+            client = _step("configure", _client)
+        except ValueError as e:
+            # DBClient raises ValueError when SQL_SERVER_NAME and friends are missing; retrying cannot fix that.
+            logger.error("Database is not configured; the app will not become ready: %s", e)
+            with _state_lock:
+                _state["status"] = "not configured"
+                _state["error"] = str(e)
+            return False
+        _step("connect", client.connect)
+        _step("query", lambda: client.execute(READY_SQL, use_cache=False))
+    except Exception as e:
+        logger.warning("Warm-up failed, retrying in %ss: %s", RETRY_INTERVAL, e)
+        with _state_lock:
+            _state["status"] = "not ready"
+            _state["error"] = str(e)
+        return False
+    with _state_lock:
+        _state["status"] = "ready"
+        _state["error"] = None
+        _state["ready_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    logger.info("Warm-up finished; app is ready.")
+    return True
+
+
+def _warm_up_until_ready():
+    while not warm_up():
+        if state()["status"] == "not configured":
+            return
+        time.sleep(RETRY_INTERVAL)
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/healthz":
+            # Liveness: the process is up and serving.
+            self._send(200, "application/json", json.dumps({"status": "alive"}))
+        elif self.path == "/readyz":
+            self._send(200 if is_ready() else 503, "application/json", json.dumps(state()))
+        elif self.path == "/metrics":
+            self._send(200, "text/plain; version=0.0.4", exporter.render())
+        else:
+            self._send(404, "text/plain", "not found\n")
+
+    def _send(self, status, content_type, body):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Probes hit this every few seconds; keep them out of the app log.
+        logger.debug("health %s", format % args)
+
+
+def start_health_server(port=None):
+    port = int(port or os.environ.get("HEALTH_PORT", DEFAULT_HEALTH_PORT))
+    server = ThreadingHTTPServer(("0.0.0.0", port), _HealthHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="azure-hello-health", daemon=True).start()
+    logger.info("Health endpoint listening on port %d (/healthz, /readyz, /metrics).", port)
+    return server
+
+
+def start(port=None):
+    """Start the health endpoint and the background warm-up (only the first call does anything)."""
+    global _started
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+    add_hook(exporter)
+    start_health_server(port)
+    threading.Thread(target=_warm_up_until_ready, name="azure-hello-warmup", daemon=True).start()
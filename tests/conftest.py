@@ -0,0 +1,41 @@
+import os
+
+# The suite runs against the SQLite stand-in; no Azure SQL server or Key Vault needed.
+os.environ["DB_BACKEND"] = "sqlite"
+os.environ["SQLITE_PATH"] = ":memory:"
+
+import pytest  # noqa: E402
+
+from azure_hello.client import DBClient  # noqa: E402
+from azure_hello.migrate import migrate_database  # noqa: E402
+from azure_hello.pool import close_all_pools  # noqa: E402
+
+
+@pytest.fixture
+def make_client():
+    """DBClient factory; every client gets its own migrated in-memory database."""
+    clients = []
+
+    def make(**options):
+        client = DBClient(**options)
+        migrate_database(client)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+    close_all_pools()
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+
+@pytest.fixture
+def add_users():
+    def add(client, count, start=1):
+        client.bulk_insert("dbo.users", [(f"user{i}", f"user{i}@example.com") for i in range(start, start + count)],
+                           columns=["username", "email"])
+    return add
@@ -0,0 +1,94 @@
+import datetime
+
+import pytest
+
+from azure_hello.result_cache import ResultCache
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_cached_result_is_not_shared_with_the_caller(make_client, add_users, columnar):
+    client = make_client(result_cache=ResultCache())
+    add_users(client, 3)
+    query = "SELECT id, username FROM dbo.users ORDER BY id"
+
+    first = client.execute_sql(query, columnar=columnar)
+    first.loc[0, "username"] = "changed on a miss"
+    second = client.execute_sql(query, columnar=columnar)
+    second.loc[1, "username"] = "changed on a hit"
+    third = client.execute_sql(query, columnar=columnar)
+
+    assert list(third["username"]) == ["user1", "user2", "user3"]
+    assert client.result_cache.hits == 2
+
+
+def test_execute_result_is_not_shared_with_the_caller(make_client, add_users):
+    client = make_client(result_cache=ResultCache())
+    add_users(client, 2)
+    query = "SELECT username FROM dbo.users WHERE id = ?"
+
+    frame = client.execute(query, [1])
+    frame.loc[0, "username"] = "changed"
+
+    assert client.execute(query, [1])["username"].tolist() == ["user1"]
+
+
+def test_write_invalidates_cached_reads(make_client, add_users):
+    client = make_client(result_cache=ResultCache())
+    add_users(client, 2)
+    query = "SELECT COUNT(*) AS n FROM dbo.users"
+    assert client.execute_sql(query)["n"].iloc[0] == 2
+
+    add_users(client, 1, start=3)
+
+    assert client.execute_sql(query)["n"].iloc[0] == 3
+
+
+@pytest.mark.parametrize("script, expected", [
+    ("SELECT 1 AS first_batch\nGO\nSELECT 2 AS second_batch", {"first_batch": [1]}),
+    ("INSERT INTO dbo.users (username, email) VALUES ('new', 'new@example.com');\n"
+     "SELECT COUNT(*) AS n FROM dbo.users", {"n": [3]}),
+    ("UPDATE dbo.users SET email = email WHERE id = 1\nGO 2\nSELECT username FROM dbo.users WHERE id = 1",
+     {"username": ["user1"]}),
+])
+def test_columnar_and_plain_return_the_same_first_result(make_client, add_users, script, expected):
+    for columnar in (False, True):
+        client = make_client()
+        add_users(client, 2)
+
+        frame = client.execute_sql(script, columnar=columnar)
+
+        assert frame.to_dict("list") == expected, f"columnar={columnar}"
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_script_without_result_set_returns_none(client, add_users, columnar):
+    add_users(client, 1)
+
+    assert client.execute_sql("DELETE FROM dbo.users WHERE id = 1\nGO\nPRINT 'done'", columnar=columnar) is None
+    assert client.execute_sql("SELECT COUNT(*) AS n FROM dbo.users")["n"].iloc[0] == 0
+
+
+def test_execute_script_collects_every_result_and_message(client):
+    output = client.execute_script("PRINT 'starting';\nSELECT 1 AS a\nGO\nSELECT 2 AS b; SELECT 3 AS c")
+
+    assert [list(frame.columns) for frame in output.results] == [["a"], ["b"], ["c"]]
+    assert output.messages == ["starting"]
+
+
+def test_iter_chunks_streams_the_whole_result(client, add_users):
+    add_users(client, 25)
+
+    chunks = list(client.iter_chunks("SELECT id FROM dbo.users ORDER BY id", chunk_size=10))
+
+    assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+    assert [int(i) for chunk in chunks for i in chunk["id"]] == list(range(1, 26))
+
+
+def test_datetime_columns_are_converted_and_aliases_left_alone(client, add_users):
+    add_users(client, 1)
+
+    row = client.execute_sql("SELECT created_at, email AS created_at_text, username AS created_at FROM dbo.users")
+
+    assert isinstance(row.iloc[0, 0].to_pydatetime(), datetime.datetime)
+    assert row.iloc[0, 1] == "user1@example.com"
+    assert row.iloc[0, 2] == "user1"
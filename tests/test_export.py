@@ -0,0 +1,58 @@
+import numpy as np
+import pyarrow.dataset as ds
+
+from azure_hello.export import _above, _in_ranges, _without, export_users, read_watermark
+
+
+def exported_ids(output_dir):
+    return sorted(ds.dataset(output_dir, format="parquet", partitioning="hive").to_table().column("id").to_pylist())
+
+
+def test_without_removes_found_ids_from_ranges():
+    assert _without([[1, 5], [10, 10]], [1, 3, 10]) == [[2, 2], [4, 5]]
+    assert _without([[1, 3]], []) == [[1, 3]]
+
+
+def test_above_trims_ranges_to_the_floor():
+    assert _above([[1, 5], [8, 9], [12, 20]], 8) == [[9, 9], [12, 20]]
+
+
+def test_in_ranges_is_inclusive():
+    assert _in_ranges(np.array([1, 2, 5, 6]), [[2, 5]]).tolist() == [False, True, True, False]
+
+
+def test_export_is_incremental(client, add_users, tmp_path):
+    add_users(client, 3)
+    first = export_users(client, str(tmp_path), chunk_size=2)
+
+    add_users(client, 2, start=4)
+    second = export_users(client, str(tmp_path), chunk_size=2)
+    third = export_users(client, str(tmp_path), chunk_size=2)
+
+    assert (first.rows, second.rows, third.rows) == (3, 2, 0)
+    assert exported_ids(tmp_path) == [1, 2, 3, 4, 5]
+    assert read_watermark(str(tmp_path))["last_id"] == 5
+
+
+def test_ids_that_commit_late_are_exported_later(client, add_users, tmp_path):
+    add_users(client, 4)
+    # Stands in for a transaction that took id 2 but had not committed during the first export.
+    client.execute_script("DELETE FROM dbo.users WHERE id = 2")
+    export_users(client, str(tmp_path))
+    assert read_watermark(str(tmp_path))["missing_ids"] == [[2, 2]]
+
+    client.execute_script("INSERT INTO dbo.users (id, username, email) VALUES (2, 'late', 'late@example.com')")
+    result = export_users(client, str(tmp_path))
+
+    assert (result.rows, result.recovered) == (1, 1)
+    assert exported_ids(tmp_path) == [1, 2, 3, 4]
+    assert read_watermark(str(tmp_path))["missing_ids"] == []
+
+
+def test_missing_ids_outside_the_overlap_window_are_forgotten(client, add_users, tmp_path):
+    add_users(client, 10)
+    client.execute_script("DELETE FROM dbo.users WHERE id = 2")
+
+    export_users(client, str(tmp_path), overlap=5)
+
+    assert read_watermark(str(tmp_path))["missing_ids"] == []
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from azure_hello.pool import ConnectionPool, PoolTimeoutError, close_all_pools, get_pool
+
+
+class Connections:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self.opened.append(connection)
+        return connection
+
+
+@pytest.fixture
+def connections():
+    return Connections()
+
+
+def test_released_connections_are_reused(connections):
+    pool = ConnectionPool(connections, min_size=0, max_size=2)
+
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert pool.size == 1
+    pool.close()
+
+
+def test_acquire_times_out_when_the_pool_is_exhausted(connections):
+    pool = ConnectionPool(connections, min_size=0, max_size=1, acquire_timeout=0.05)
+
+    with pool.connection():
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+    pool.close()
+
+
+def test_broken_connection_is_replaced(connections):
+    pool = ConnectionPool(connections, min_size=0, max_size=1)
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        with pool.connection() as connection:
+            connection.close()
+            connection.execute("SELECT 1")
+    with pool.connection() as replacement:
+        replacement.execute("SELECT 1")
+
+    assert replacement is not connection
+    assert pool.size == 1
+    pool.close()
+
+
+def test_fill_opens_min_size_connections(connections):
+    pool = ConnectionPool(connections, min_size=2, max_size=3)
+
+    pool.fill()
+
+    assert (pool.size, pool.idle_count) == (2, 2)
+    pool.close()
+
+
+def test_shared_pool_grows_for_a_larger_max_size(connections):
+    try:
+        pool = get_pool("test", connections, min_size=0, max_size=2)
+
+        assert get_pool("test", connections, min_size=0, max_size=4) is pool
+        assert pool.max_size == 4
+        assert get_pool("test", connections, min_size=0, max_size=3).max_size == 4
+    finally:
+        close_all_pools()
@@ -0,0 +1,128 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from azure_hello import retry
+from azure_hello.retry import (
+    CircuitBreaker, CircuitOpenError, error_codes, is_connection_error, is_login_failure, is_throttling, is_transient,
+)
+
+DRIVER = "[Microsoft][ODBC Driver 18 for SQL Server][SQL Server]"
+
+
+class FakeODBCError(Exception):
+    pass
+
+
+def odbc_error(sqlstate, message):
+    return FakeODBCError(sqlstate, f"[{sqlstate}] {message}")
+
+
+def test_native_codes_are_read_from_the_diagnostic_suffix():
+    error = odbc_error("08S01", "[Microsoft][ODBC Driver 18 for SQL Server]TCP Provider: "
+                                "An existing connection was forcibly closed by the remote host.\r\n (10054) (SQLExecDirectW)")
+
+    assert error_codes(error) == ("08S01", {10054})
+    assert is_connection_error(error)
+    assert is_transient(error)
+
+
+def test_numbers_in_the_message_are_not_error_codes():
+    # 40613 and 10928 are transient codes, but here they are only the value that did not fit.
+    error = odbc_error("22001", f"{DRIVER}String or binary data would be truncated in table 'dbo.users', "
+                                "column 'email'. Truncated value: '(40613) (10928)'. (2628) (SQLExecDirectW)")
+
+    assert error_codes(error) == ("22001", {2628})
+    assert not is_transient(error)
+    assert not is_connection_error(error)
+
+
+def test_later_diagnostic_records_are_read_too():
+    error = odbc_error("42000", f"{DRIVER}Resource ID : 1. The request limit for the database is 30 and has been "
+                                f"reached. (10928) (SQLExecDirectW); [42000] {DRIVER}The statement has been terminated. (3621)")
+
+    assert error_codes(error)[1] == {10928, 3621}
+    assert is_throttling(error)
+    assert is_transient(error)
+
+
+def test_login_failure_is_not_transient():
+    error = odbc_error("28000", f"{DRIVER}Login failed for user 'azureuser'. (18456) (SQLDriverConnect)")
+
+    assert is_login_failure(error)
+    assert not is_transient(error)
+
+
+def test_plain_errors_have_no_codes():
+    assert error_codes(ValueError("invalid literal for int() with base 10: '(40613)'")) == (None, set())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(retry.time, "monotonic", clock)
+    return clock
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_half_open_trial_success_closes_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+
+    assert breaker.state == "half-open"
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_trial_failure_reopens_the_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+
+
+def test_released_trial_lets_another_thread_try(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+
+    def call_from_another_thread():
+        try:
+            breaker.before_call()
+            return "allowed"
+        except CircuitOpenError:
+            return "rejected"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(call_from_another_thread).result() == "rejected"
+        breaker.release_trial()
+        assert executor.submit(call_from_another_thread).result() == "allowed"
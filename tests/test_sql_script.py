@@ -0,0 +1,36 @@
+from azure_hello.sql_script import clean_message, split_batches
+from azure_hello.sqlite_adapter import translate
+
+
+def test_split_on_go_lines():
+    script = "CREATE TABLE t (a INT)\ngo\nINSERT INTO t VALUES (1)\nGO 3\n  GO;  -- done\nSELECT * FROM t\n"
+
+    assert split_batches(script) == [
+        ("CREATE TABLE t (a INT)", 1),
+        ("INSERT INTO t VALUES (1)", 3),
+        ("SELECT * FROM t", 1),
+    ]
+
+
+def test_go_inside_comments_and_strings_is_not_a_separator():
+    script = "/* setup\nGO\n*/\nINSERT INTO t VALUES ('first line\nGO\nlast line')\nGO\nSELECT 1"
+
+    batches = split_batches(script)
+
+    assert [repeat for _batch, repeat in batches] == [1, 1]
+    assert batches[0][0].endswith("last line')")
+    assert batches[1] == ("SELECT 1", 1)
+
+
+def test_words_containing_go_are_not_separators():
+    assert split_batches("SELECT 'GO' AS going\nGOTO done") == [("SELECT 'GO' AS going\nGOTO done", 1)]
+
+
+def test_clean_message_strips_driver_prefix():
+    assert clean_message("[Microsoft][ODBC Driver 18 for SQL Server][SQL Server]Table created.") == "Table created."
+
+
+def test_translate_top_and_schema():
+    assert translate("SELECT TOP 5 id FROM dbo.users ORDER BY id") == "SELECT id FROM users ORDER BY id LIMIT 5"
+    assert translate("SELECT TOP (?) id FROM dbo.users;") == "SELECT id FROM users LIMIT ?"
+
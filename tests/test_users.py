@@ -0,0 +1,46 @@
+import pytest
+
+from azure_hello.users import users_page
+
+
+def all_pages(client, order, page_size):
+    pages = []
+    after = None
+    while True:
+        frame, after = users_page(client, order=order, after=after, page_size=page_size)
+        pages.append([int(user_id) for user_id in frame["id"]])
+        if after is None:
+            return pages
+
+
+@pytest.mark.parametrize("order, expected", [
+    ("id", [[1, 2], [3, 4], [5]]),
+    ("newest", [[5, 4], [3, 2], [1]]),
+])
+def test_pages_cover_every_user_once(client, add_users, order, expected):
+    add_users(client, 5)
+
+    assert all_pages(client, order, page_size=2) == expected
+
+
+def test_exact_multiple_of_page_size_has_no_empty_last_page(client, add_users):
+    add_users(client, 4)
+
+    assert all_pages(client, "id", page_size=2) == [[1, 2], [3, 4]]
+
+
+def test_rows_inserted_between_pages_do_not_shift_the_next_page(client, add_users):
+    add_users(client, 4)
+    _frame, after = users_page(client, order="newest", page_size=2)
+
+    add_users(client, 2, start=5)
+    frame, _after = users_page(client, order="newest", after=after, page_size=2)
+
+    assert frame["id"].tolist() == [2, 1]
+
+
+def test_invalid_arguments_are_rejected(client):
+    with pytest.raises(ValueError):
+        users_page(client, order="username")
+    with pytest.raises(ValueError):
+        users_page(client, page_size=0)
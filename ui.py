@@ -1,4 +1,4 @@
-from azure_hello import main_ui
+from azure_hello.main_ui import main_ui
 
 if __name__ == "__main__":
     main_ui()
\ No newline at end of file